@@ -12,7 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from backend.core.config import settings
 from backend.models.base import Base
 from backend.models.user import User
-from backend.models.note import Note, Tag
+from backend.models.note import Note, NoteTombstone, Tag, TagUsage
 
 # Get Alembic configuration
 config = context.config
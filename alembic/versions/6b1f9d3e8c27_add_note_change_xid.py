@@ -0,0 +1,36 @@
+"""Order the note change feed by writing transaction
+
+Revision ID: 6b1f9d3e8c27
+Revises: c5d8f1a3e692
+Create Date: 2026-10-18 21:14:52.608133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1f9d3e8c27'
+down_revision: Union[str, None] = 'c5d8f1a3e692'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XACT_ID = sa.text("(pg_current_xact_id()::text::bigint)")
+
+
+def upgrade() -> None:
+    # Existing rows take this migration's transaction id, which is older
+    # than any write that follows it
+    for table in ('notes', 'note_tombstones'):
+        op.add_column(table, sa.Column('change_xid', sa.BigInteger(), server_default=CURRENT_XACT_ID, nullable=False))
+        op.drop_index(f'ix_{table}_owner_id_change_seq', table_name=table)
+        op.create_index(f'ix_{table}_owner_id_change_xid_change_seq', table, ['owner_id', 'change_xid', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ('notes', 'note_tombstones'):
+        op.drop_index(f'ix_{table}_owner_id_change_xid_change_seq', table_name=table)
+        op.create_index(f'ix_{table}_owner_id_change_seq', table, ['owner_id', 'change_seq'], unique=False)
+        op.drop_column(table, 'change_xid')
@@ -0,0 +1,26 @@
+"""Add (owner_id, id) index on notes for keyset pagination
+
+Revision ID: 7c1e4b2a9d30
+Revises: 5a3bcd8fd566
+Create Date: 2026-10-18 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b2a9d30'
+down_revision: Union[str, None] = '5a3bcd8fd566'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notes_owner_id_id', 'notes', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_owner_id_id', table_name='notes')
@@ -0,0 +1,39 @@
+"""Add tag_usage table with per-user tag note counts
+
+Revision ID: a9c3e5f7b214
+Revises: f2b6c8d1e357
+Create Date: 2026-10-18 16:20:53.871406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f7b214'
+down_revision: Union[str, None] = 'f2b6c8d1e357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tag_usage',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('note_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'tag_id')
+    )
+    op.execute(
+        "INSERT INTO tag_usage (owner_id, tag_id, note_count) "
+        "SELECT notes.owner_id, note_tag_association.tag_id, count(*) "
+        "FROM notes JOIN note_tag_association ON note_tag_association.note_id = notes.id "
+        "GROUP BY notes.owner_id, note_tag_association.tag_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('tag_usage')
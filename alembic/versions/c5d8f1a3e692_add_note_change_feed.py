@@ -0,0 +1,50 @@
+"""Add note change sequence, tombstones and server-side timestamps
+
+Revision ID: c5d8f1a3e692
+Revises: a9c3e5f7b214
+Create Date: 2026-10-18 17:02:36.415870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8f1a3e692'
+down_revision: Union[str, None] = 'a9c3e5f7b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEXT_CHANGE = sa.text("nextval('note_change_seq')")
+UTC_NOW = sa.text("(now() at time zone 'utc')")
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE note_change_seq")
+    # The volatile default numbers every existing row as the column is added
+    op.add_column('notes', sa.Column('change_seq', sa.BigInteger(), server_default=NEXT_CHANGE, nullable=False))
+    op.create_index('ix_notes_owner_id_change_seq', 'notes', ['owner_id', 'change_seq'], unique=False)
+    op.alter_column('notes', 'created_at', server_default=UTC_NOW)
+    op.alter_column('notes', 'updated_at', server_default=UTC_NOW)
+
+    op.create_table('note_tombstones',
+    sa.Column('note_id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), server_default=NEXT_CHANGE, nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id')
+    )
+    op.create_index('ix_note_tombstones_owner_id_change_seq', 'note_tombstones', ['owner_id', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_tombstones_owner_id_change_seq', table_name='note_tombstones')
+    op.drop_table('note_tombstones')
+    op.alter_column('notes', 'updated_at', server_default=None)
+    op.alter_column('notes', 'created_at', server_default=None)
+    op.drop_index('ix_notes_owner_id_change_seq', table_name='notes')
+    op.drop_column('notes', 'change_seq')
+    op.execute("DROP SEQUENCE note_change_seq")
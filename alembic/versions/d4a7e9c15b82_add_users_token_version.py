@@ -0,0 +1,26 @@
+"""Add token_version to users for stateless token revocation
+
+Revision ID: d4a7e9c15b82
+Revises: b3f81d6c2e47
+Create Date: 2026-10-18 11:20:51.904316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e9c15b82'
+down_revision: Union[str, None] = 'b3f81d6c2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,29 @@
+"""Add version column to notes for ETags and optimistic locking
+
+Revision ID: e81f2c9a4d16
+Revises: d4a7e9c15b82
+Create Date: 2026-10-18 13:05:19.230441
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f2c9a4d16'
+down_revision: Union[str, None] = 'd4a7e9c15b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notes', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    # Rows written while the timestamp defaults were frozen at import time
+    # may be missing updated_at; fall back to created_at.
+    op.execute("UPDATE notes SET updated_at = created_at WHERE updated_at IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('notes', 'version')
@@ -0,0 +1,26 @@
+"""Add (tag_id, note_id) index on note_tag_association for tag filtering
+
+Revision ID: f2b6c8d1e357
+Revises: e81f2c9a4d16
+Create Date: 2026-10-18 15:41:27.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6c8d1e357'
+down_revision: Union[str, None] = 'e81f2c9a4d16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_note_tag_association_tag_id_note_id', 'note_tag_association', ['tag_id', 'note_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_tag_association_tag_id_note_id', table_name='note_tag_association')
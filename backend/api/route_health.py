@@ -0,0 +1,48 @@
+"""
+API routes for operational health and introspection.
+
+Includes database connection pool, note cache and note event statistics.
+"""
+
+from fastapi import APIRouter
+from backend.core import note_cache, note_events
+from backend.db import database, replicas
+from backend.db.pool import pool_status
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/db-pool")
+def read_db_pool():
+    """
+    Report checked-out, idle and overflow connections and checkout wait
+    times for each database engine.
+    """
+    pools = {"primary": pool_status(database.engine)}
+    if database.async_engine is not None:
+        pools["primary_async"] = pool_status(database.async_engine)
+    for replica in replicas.router.replicas:
+        pools[replica.name] = pool_status(replica.engine)
+    return pools
+
+@router.get("/replicas")
+def read_replicas():
+    """
+    Report replica health, lag and how many reads were routed to replicas
+    versus kept on the primary.
+    """
+    return replicas.router.status()
+
+@router.get("/note-cache")
+def read_note_cache():
+    """
+    Report note cache hit, miss and eviction counters.
+    """
+    return {"note_cache": note_cache.stats()}
+
+@router.get("/note-events")
+def read_note_events():
+    """
+    Report note event stream subscribers, published events and
+    subscriptions dropped for falling behind.
+    """
+    return {"note_events": note_events.stats()}
@@ -1,82 +1,438 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from backend.db.database import get_db
-from backend.schemas.note import Note, NoteCreate, NoteUpdate
-from backend.models.note import Note as NoteModel
-from backend.core.deps import get_current_user
-from backend.models.user import User
+from sqlalchemy.orm.exc import StaleDataError
+from backend.db.database import get_db, run_db
+from backend.db import replicas
+from backend.db.instrumentation import exempt_from_query_budget
+from backend.schemas.note import Note, NoteCreate, NotePatch, NoteUpdate, NoteBulkCreate, NoteBulkError, NoteBulkResult, NoteImportResult, NoteBatchDelete, NoteBatchDeleteResult, NoteBatchGet, NoteBatchGetResult, NoteChanges
+from backend.core.deps import get_current_user, get_read_db
+from backend.core.auth_cache import AuthenticatedUser
+from backend.core import note_cache, note_events
+from backend.core.config import settings
+from backend.crud import note as note_crud
+from backend.utils.pagination import decode_change_cursor, decode_cursor, encode_change_cursor, encode_cursor
+from backend.utils.http_cache import is_not_modified, if_match_satisfied, if_match_versions, note_etag, page_etag, validator_headers
+from backend.utils.serialization import FastJSONResponse, note_dicts, render_note, render_note_batch, render_notes
+from backend.utils.export import CsvEncoder, aencode_batches, encode_batches, encode_ndjson
+from backend.utils.ndjson import iter_lines
 from backend.logger import logger
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
+def _respond(response: Response, content, headers: Optional[dict] = None, many: bool = False, status_code: int = 200):
+    """
+    Return note content either pre-rendered (FAST_JSON) or as ORM objects for
+    FastAPI's response_model path; both produce the same bytes.
+    """
+    if settings.FAST_JSON:
+        body = render_notes(content) if many else render_note(content)
+        return FastJSONResponse(body, status_code=status_code, headers=headers)
+    if headers:
+        response.headers.update(headers)
+    return content
+
 @router.post("/", response_model=Note, status_code=201)
-def create_note(note: NoteCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    logger.info(f"Creating a note for user_id={current_user.id} with title='{note.title}'")
-    db_note = NoteModel(**note.dict(exclude={"tags"}), owner_id=current_user.id)
-
-    if note.tags:
-        tags = []
-        for tag_in in note.tags:
-            tag = db.query(NoteModel.tags.property.mapper.class_).filter_by(name=tag_in.name).first()
-            if not tag:
-                logger.info(f"Creating new tag '{tag_in.name}' for note")
-                tag = NoteModel.tags.property.mapper.class_(name=tag_in.name)
-                db.add(tag)
-                db.commit()
-                db.refresh(tag)
-            tags.append(tag)
-        db_note.tags = tags
-
-    db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
-    logger.info(f"Note created successfully with id={db_note.id}")
-    return db_note
+async def create_note(
+    note: NoteCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    logger.info("Creating a note for user_id=%s with title='%s'", current_user.id, note.title)
+    db_note = await run_db(db, note_crud.create_note, note_in=note, owner_id=current_user.id)
+    logger.info("Note created successfully with id=%s", db_note.id)
+    return _respond(response, db_note, status_code=201)
+
+@router.post("/bulk", response_model=NoteBulkResult, status_code=201)
+async def create_notes_bulk(payload: NoteBulkCreate, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Create many notes in one request.
+
+    Each item is validated against NoteCreate on its own; invalid items are
+    reported in ``errors`` by index and the rest are inserted together.
+    """
+    if len(payload.notes) > settings.NOTE_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk requests are limited to {settings.NOTE_BULK_MAX_ITEMS} notes",
+        )
+
+    valid, errors = [], []
+    for index, item in enumerate(payload.notes):
+        try:
+            valid.append(NoteCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append(NoteBulkError(index=index, detail=str(e.errors(include_url=False))))
+
+    logger.info("Bulk create for user_id=%s: %s valid, %s rejected", current_user.id, len(valid), len(errors))
+    created_ids = await run_db(db, note_crud.create_notes_bulk, notes_in=valid, owner_id=current_user.id)
+    result = NoteBulkResult(created_ids=created_ids, errors=errors)
+    if settings.FAST_JSON:
+        return FastJSONResponse(result.model_dump(), status_code=201)
+    return result
+
+@router.post("/import", response_model=NoteImportResult)
+async def import_notes(request: Request, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Import notes from an NDJSON request body, one NoteCreate object per line.
+
+    The body is parsed as it arrives and committed every NOTE_IMPORT_BATCH_SIZE
+    valid lines (with COPY on Postgres), so memory use does not depend on the
+    payload size. Invalid lines are skipped and reported by line number; a
+    failing batch stops the import, leaving earlier batches committed.
+    """
+    exempt_from_query_budget()
+    use_copy = await run_db(db, note_crud.supports_copy)
+    batch_size = settings.NOTE_IMPORT_BATCH_SIZE
+    result = NoteImportResult()
+    batch = []
+
+    def reject(line_no: int, detail: str) -> None:
+        if len(result.errors) < settings.NOTE_IMPORT_MAX_ERRORS:
+            result.errors.append(NoteBulkError(index=line_no, detail=detail))
+        else:
+            result.errors_truncated = True
+
+    async def flush() -> None:
+        ids = await run_db(db, note_crud.create_notes_bulk, notes_in=batch, owner_id=current_user.id, use_copy=use_copy)
+        result.imported += len(ids)
+        result.batches += 1
+        batch.clear()
+        logger.info("Import for user_id=%s: %s notes committed after %s lines", current_user.id, result.imported, result.lines)
+
+    async for line_no, line in iter_lines(request.stream(), settings.NOTE_IMPORT_MAX_LINE_BYTES):
+        result.lines = line_no
+        if line is None:
+            reject(line_no, f"Line exceeds {settings.NOTE_IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            batch.append(NoteCreate.model_validate_json(line))
+        except ValidationError as e:
+            reject(line_no, str(e.errors(include_url=False)))
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    if settings.FAST_JSON:
+        return FastJSONResponse(result.model_dump())
+    return result
+
+@router.post("/batch-get", response_model=NoteBatchGetResult)
+async def batch_get_notes(payload: NoteBatchGet, db: Session = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Fetch many of the current user's notes in one request. IDs that do not
+    exist or belong to someone else are listed in ``missing``.
+    """
+    if len(payload.ids) > settings.NOTE_BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch reads are limited to {settings.NOTE_BATCH_GET_MAX_IDS} ids",
+        )
+    notes = await run_db(db, note_crud.get_notes_by_ids, owner_id=current_user.id, ids=payload.ids)
+    found = {note.id for note in notes}
+    missing = [note_id for note_id in dict.fromkeys(payload.ids) if note_id not in found]
+    if settings.FAST_JSON:
+        return FastJSONResponse(render_note_batch(notes, missing))
+    return {"notes": notes, "missing": missing}
+
+@router.post("/batch-delete", response_model=NoteBatchDeleteResult)
+async def batch_delete_notes(payload: NoteBatchDelete, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Delete the current user's notes matching all given criteria (ids, tag,
+    created_before) and return how many were removed. Notes owned by
+    others are never matched.
+    """
+    if payload.ids is not None and len(payload.ids) > settings.NOTE_BATCH_DELETE_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch deletes are limited to {settings.NOTE_BATCH_DELETE_MAX_IDS} ids",
+        )
+    exempt_from_query_budget()
+    deleted = await run_db(
+        db,
+        note_crud.delete_notes,
+        owner_id=current_user.id,
+        ids=payload.ids,
+        tag=payload.tag,
+        created_before=payload.created_before,
+        chunk_size=settings.NOTE_BATCH_DELETE_CHUNK_SIZE,
+    )
+    return NoteBatchDeleteResult(deleted=deleted)
+
+@router.get("/search", response_model=list[Note])
+async def search_notes(
+    response: Response,
+    q: str = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = 10,
+    db: Session = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Search the current user's notes by title and content, best matches first.
+    """
+    notes = await run_db(db, note_crud.search_notes, owner_id=current_user.id, q=q, skip=skip, limit=limit)
+    return _respond(response, notes, many=True)
+
+@router.get("/changes", response_model=NoteChanges)
+async def read_note_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Return notes created or updated, and IDs of notes deleted, after the
+    ``since`` cursor. Omit ``since`` for a full initial sync; afterwards pass
+    the returned ``cursor`` back, repeating while ``has_more`` is true.
+    """
+    position = (0, 0)
+    if since is not None:
+        try:
+            position = decode_change_cursor(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    notes, deleted, next_position, has_more = await run_db(
+        db, note_crud.get_changes, owner_id=current_user.id, since=position, limit=limit
+    )
+    cursor = encode_change_cursor(next_position)
+    if settings.FAST_JSON:
+        return FastJSONResponse({"notes": note_dicts(notes), "deleted": deleted, "cursor": cursor, "has_more": has_more})
+    return {"notes": notes, "deleted": deleted, "cursor": cursor, "has_more": has_more}
+
+@router.get("/stream")
+async def stream_note_events(request: Request, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Push the current user's note changes as server-sent events.
+
+    Each event is named ``created``, ``updated`` or ``deleted`` and carries
+    the note ``id`` (plus ``version`` for creates and updates). A comment
+    line is sent every NOTE_STREAM_HEARTBEAT_SECONDS to keep proxies from
+    closing an idle connection. If the client falls too far behind, a
+    ``resync`` event is sent and the stream closes; the client should catch
+    up from ``/notes/changes`` and reconnect.
+    """
+    async def events():
+        subscription = note_events.subscribe(current_user.id)
+        logger.info("Note event stream opened for user_id=%s", current_user.id)
+        try:
+            yield b": connected\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.NOTE_STREAM_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    logger.warning("Note event stream for user_id=%s fell behind; asking client to resync", current_user.id)
+                    yield b"event: resync\ndata: {}\n\n"
+                    return
+                if event is None:
+                    yield b": heartbeat\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+        finally:
+            note_events.unsubscribe(subscription)
+            logger.info("Note event stream closed for user_id=%s", current_user.id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/export")
+async def export_notes(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Stream every note of the current user, with tags, as NDJSON or CSV.
+
+    Rows come from a server-side cursor in batches of NOTE_EXPORT_BATCH_SIZE,
+    so memory stays flat regardless of the number of notes. ``gzip=true``
+    compresses the stream (``Content-Encoding: gzip``).
+    """
+    encoder = encode_ndjson if format == "ndjson" else CsvEncoder()
+    batch_size = settings.NOTE_EXPORT_BATCH_SIZE
+    # Two statements per batch; the count scales with the user's notes by design
+    exempt_from_query_budget()
+
+    # The request's dependency cleanup runs before the body is streamed, so
+    # the generators own the session from here on and close it when done.
+    if isinstance(db, Session):
+        def body():
+            try:
+                yield from encode_batches(note_crud.iter_export_batches(db, current_user.id, batch_size), encoder, gzip)
+            finally:
+                db.close()
+    else:
+        async def body():
+            try:
+                async for chunk in aencode_batches(note_crud.aiter_export_batches(db, current_user.id, batch_size), encoder, gzip):
+                    yield chunk
+            finally:
+                await db.close()
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv; charset=utf-8"
+    headers = {"Content-Disposition": f'attachment; filename="notes.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+def _has_conditional_get(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def _cached_note_response(request: Request, entry: note_cache.NoteCacheEntry) -> Response:
+    headers = validator_headers(entry.etag, entry.updated_at)
+    if is_not_modified(request.headers, entry.etag, entry.updated_at):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(entry.body, headers=headers)
 
 @router.get("/{note_id}", response_model=Note)
-def read_note(note_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    logger.info(f"Fetching note id={note_id} for user_id={current_user.id}")
-    db_note = db.query(NoteModel).filter(NoteModel.id == note_id, NoteModel.owner_id == current_user.id).first()
+async def read_note(
+    note_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Fetch one note. Responses carry ``ETag`` and ``Last-Modified``; a matching
+    ``If-None-Match`` / ``If-Modified-Since`` returns 304 after a lookup of
+    the validators alone. Rendered responses are served from the note cache
+    when present.
+    """
+    logger.info("Fetching note id=%s for user_id=%s", note_id, current_user.id)
+    entry = note_cache.get(current_user.id, note_id)
+    if entry is not None:
+        return _cached_note_response(request, entry)
+
+    if _has_conditional_get(request):
+        validator = await run_db(db, note_crud.get_note_validator, note_id=note_id, owner_id=current_user.id)
+        if validator is not None:
+            version, updated_at = validator
+            etag = note_etag(note_id, version)
+            if is_not_modified(request.headers, etag, updated_at):
+                return Response(status_code=304, headers=validator_headers(etag, updated_at))
+
+    read_started = note_cache.read_started()
+    db_note = await run_db(db, note_crud.get_owned_note, note_id=note_id, owner_id=current_user.id)
     if not db_note:
-        logger.warning(f"Note id={note_id} not found for user_id={current_user.id}")
+        logger.warning("Note id=%s not found for user_id=%s", note_id, current_user.id)
         raise HTTPException(status_code=404, detail="Note not found")
-    return db_note
+    entry = note_cache.NoteCacheEntry(
+        body=render_note(db_note),
+        etag=note_etag(db_note.id, db_note.version),
+        updated_at=db_note.updated_at,
+    )
+    # A replica may lag the primary; caching its answer could outlive the lag
+    if not replicas.is_replica_session(db):
+        note_cache.put(current_user.id, note_id, entry, read_started)
+    return _cached_note_response(request, entry)
 
 @router.get("/", response_model=list[Note])
-def read_notes(skip: int = 0, limit: int = 10, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    notes = db.query(NoteModel).filter(NoteModel.owner_id == current_user.id).offset(skip).limit(limit).all()
-    return notes
+async def read_notes(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    tag: Optional[List[str]] = Query(None),
+    match: Literal["any", "all"] = "any",
+    db: Session = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    List the current user's notes ordered by id.
+
+    Repeat ``tag`` to keep only notes carrying any of the given tags, or all
+    of them with ``match=all``.
+
+    Pass ``cursor`` (taken from the ``X-Next-Cursor`` header of the previous
+    page) for keyset pagination; ``skip`` is still honoured when no cursor is
+    given. ``X-Next-Cursor`` is only set when the page is full.
+    The page ``ETag`` covers the id and version of every note on it. No
+    ``Last-Modified`` is sent: a note deleted from (or moving off) the page
+    would not advance it, so only ``If-None-Match`` is honoured.
+    """
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    page_args = dict(skip=skip, limit=limit, owner_id=current_user.id, after_id=after_id, tags=tag, match_all=match == "all")
+    if "if-none-match" in request.headers:
+        validators = await run_db(db, note_crud.get_notes_validators, **page_args)
+        etag = page_etag(validators)
+        if is_not_modified(request.headers, etag, None):
+            headers = validator_headers(etag, None)
+            if validators and len(validators) == limit:
+                headers["X-Next-Cursor"] = encode_cursor(validators[-1][0])
+            return Response(status_code=304, headers=headers)
+
+    notes = await run_db(db, note_crud.get_notes, **page_args)
+    headers = validator_headers(page_etag((note.id, note.version) for note in notes), None)
+    if notes and len(notes) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(notes[-1].id)
+    return _respond(response, notes, headers=headers, many=True)
 
 @router.put("/{note_id}", response_model=Note)
-def update_note(note_id: int, note_in: NoteUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_note = db.query(NoteModel).filter(NoteModel.id == note_id, NoteModel.owner_id == current_user.id).first()
+async def update_note(
+    note_id: int,
+    note_in: NoteUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Replace a note. An ``If-Match`` header makes the write conditional on
+    the note's current ETag; a mismatch (or a concurrent write) returns 412.
+    """
+    db_note = await run_db(db, note_crud.get_owned_note, note_id=note_id, owner_id=current_user.id)
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
+    if not if_match_satisfied(request.headers, note_etag(db_note.id, db_note.version)):
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Note has been modified")
+    try:
+        db_note = await run_db(db, note_crud.update_note, note=db_note, note_in=note_in)
+    except StaleDataError:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Note has been modified")
+    return _respond(response, db_note, headers=validator_headers(note_etag(db_note.id, db_note.version), db_note.updated_at))
 
-    db_note.title = note_in.title
-    db_note.content = note_in.content
-
-    if note_in.tags is not None:
-        tags = []
-        for tag_in in note_in.tags:
-            tag = db.query(NoteModel.tags.property.mapper.class_).filter_by(name=tag_in.name).first()
-            if not tag:
-                tag = NoteModel.tags.property.mapper.class_(name=tag_in.name)
-                db.add(tag)
-                db.commit()
-                db.refresh(tag)
-            tags.append(tag)
-        db_note.tags = tags
-
-    db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
-    return db_note
+@router.patch("/{note_id}", response_model=Note)
+async def patch_note(
+    note_id: int,
+    patch: NotePatch,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Partially update a note: only fields present in the body are written,
+    and tags can be added or removed without resending the full set.
+    ``If-Match`` is checked in the UPDATE itself; a mismatch returns 412.
+    """
+    expected_versions = if_match_versions(request.headers, note_id)
+    patched = await run_db(
+        db, note_crud.patch_note, note_id=note_id, owner_id=current_user.id, patch=patch, expected_versions=expected_versions
+    )
+    if patched is None:
+        if expected_versions is not None and await run_db(db, note_crud.get_note_validator, note_id=note_id, owner_id=current_user.id):
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Note has been modified")
+        raise HTTPException(status_code=404, detail="Note not found")
+    return _respond(response, patched, headers=validator_headers(note_etag(note_id, patched["version"]), patched["updated_at"]))
 
 @router.delete("/{note_id}", status_code=204)
-def delete_note(note_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_note = db.query(NoteModel).filter(NoteModel.id == note_id, NoteModel.owner_id == current_user.id).first()
+async def delete_note(note_id: int, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    db_note = await run_db(db, note_crud.get_owned_note, note_id=note_id, owner_id=current_user.id)
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
-    db.delete(db_note)
-    db.commit()
+    await run_db(db, note_crud.delete_note, note=db_note)
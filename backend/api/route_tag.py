@@ -0,0 +1,32 @@
+"""
+API routes for tags.
+
+Includes the current user's tag list with optional per-tag note counts.
+"""
+
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from backend.db.database import run_db
+from backend.schemas.note import TagWithCount
+from backend.core.deps import get_current_user, get_read_db
+from backend.core.auth_cache import AuthenticatedUser
+from backend.crud import tag as tag_crud
+
+router = APIRouter(prefix="/tags", tags=["Tags"])
+
+@router.get("/", response_model=List[TagWithCount], response_model_exclude_none=True)
+async def read_tags(
+    with_counts: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    List the tags on the current user's notes, ordered by name. With
+    ``with_counts=true`` each tag includes how many notes carry it.
+    """
+    usages = await run_db(db, tag_crud.get_tags, owner_id=current_user.id)
+    return [
+        TagWithCount(id=usage.tag.id, name=usage.tag.name, note_count=usage.note_count if with_counts else None)
+        for usage in usages
+    ]
@@ -8,56 +8,61 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from backend.schemas import user as user_schema
 from backend.crud import user as user_crud
-from backend.db.database import get_db
-from backend.core.deps import get_current_user
-from backend.models.user import User
+from backend.db.database import get_db, run_db
+from backend.core.deps import get_current_user, get_read_db
+from backend.core.security import password_hasher
+from backend.core.auth_cache import AuthenticatedUser
 from backend.logger import logger  # Logger for info and error tracking
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/", response_model=user_schema.User, status_code=201)
-def create_user(user_in: user_schema.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_in: user_schema.UserCreate, db: Session = Depends(get_db)):
     """
     Create a new user.
 
     Checks if email is already registered before creation.
     """
-    logger.info(f"Attempting to create user with email: {user_in.email}")
-    db_user = user_crud.get_user_by_email(db, email=user_in.email)
+    logger.info("Attempting to create user with email: %s", user_in.email)
+    db_user = await run_db(db, user_crud.get_user_by_email, email=user_in.email)
     if db_user:
-        logger.warning(f"User creation failed: Email already registered - {user_in.email}")
+        logger.warning("User creation failed: Email already registered - %s", user_in.email)
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = user_crud.create_user(db, user_in=user_in)
-    logger.info(f"User created successfully: id={user.id}, email={user.email}")
+    hashed_password = await password_hasher.hash(user_in.password)
+    user = await run_db(db, user_crud.create_user, user_in=user_in, hashed_password=hashed_password)
+    logger.info("User created successfully: id=%s, email=%s", user.id, user.email)
     return user
 
 @router.get("/{user_id}", response_model=user_schema.User)
-def read_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def read_user(user_id: int, db: Session = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     """
     Retrieve a user by ID.
 
     Raises 404 if user not found.
     """
-    logger.info(f"Fetching user with id={user_id}")
-    db_user = user_crud.get_user(db, user_id=user_id)
+    logger.info("Fetching user with id=%s", user_id)
+    db_user = await run_db(db, user_crud.get_user, user_id=user_id)
     if not db_user:
-        logger.warning(f"User not found with id={user_id}")
+        logger.warning("User not found with id=%s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
-    logger.info(f"User fetched: id={db_user.id}, username={db_user.username}")
+    logger.info("User fetched: id=%s, username=%s", db_user.id, db_user.username)
     return db_user
 
 @router.put("/{user_id}", response_model=user_schema.User)
-def update_user(user_id: int, user_in: user_schema.UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_user(user_id: int, user_in: user_schema.UserUpdate, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     """
     Update user details for a given user ID.
 
     Raises 404 if user not found.
     """
-    logger.info(f"Attempting to update user id={user_id}")
-    user = user_crud.get_user(db, user_id=user_id)
+    logger.info("Attempting to update user id=%s", user_id)
+    user = await run_db(db, user_crud.get_user, user_id=user_id)
     if not user:
-        logger.warning(f"User not found for update: id={user_id}")
+        logger.warning("User not found for update: id=%s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
-    updated_user = user_crud.update_user(db, user=user, user_in=user_in)
-    logger.info(f"User updated: id={updated_user.id}, username={updated_user.username}")
+    hashed_password = None
+    if user_in.password is not None:
+        hashed_password = await password_hasher.hash(user_in.password)
+    updated_user = await run_db(db, user_crud.update_user, user=user, user_in=user_in, hashed_password=hashed_password)
+    logger.info("User updated: id=%s, username=%s", updated_user.id, updated_user.username)
     return updated_user
@@ -0,0 +1,57 @@
+"""
+In-process cache of authenticated principals.
+
+Lets ``get_current_user`` resolve a JWT to a user without a database round
+trip. Entries are keyed by user id and carry the user's ``token_version``;
+tokens minted before a credential change carry an older version and are
+rejected. ``invalidate`` is called when credentials change; other worker
+processes pick the change up once their entry's TTL expires.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+from backend.core.config import settings
+from backend.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    Lightweight snapshot of the user a request is authenticated as.
+    """
+    id: int
+    email: str
+    username: str
+    token_version: int
+
+
+_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def principal_from_user(user) -> AuthenticatedUser:
+    return AuthenticatedUser(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        token_version=user.token_version or 0,
+    )
+
+
+def get(user_id: int) -> Optional[AuthenticatedUser]:
+    return _cache.get(user_id)
+
+
+def put(principal: AuthenticatedUser) -> None:
+    _cache.set(principal.id, principal)
+
+
+def invalidate(user_id: int) -> None:
+    _cache.pop(user_id)
+
+
+def clear() -> None:
+    _cache.clear()
+
+
+def stats() -> dict:
+    return _cache.stats()
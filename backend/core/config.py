@@ -10,15 +10,96 @@ else:
     load_dotenv(".env")
 
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, model_validator
+from typing import List, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     DEBUG: bool = Field(default=False, env="DEBUG")
     API_URL: str = Field(..., env="API_URL")
+    DB_ASYNC: bool = Field(default=False, env="DB_ASYNC")
+    ASYNC_DATABASE_URL: Optional[str] = Field(default=None, env="ASYNC_DATABASE_URL")
+    DB_POOL_MODE: str = Field(default="queue", env="DB_POOL_MODE") # "queue" or "null" (PgBouncer)
+    DB_POOL_SIZE: int = Field(default=5, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=30, env="DB_POOL_TIMEOUT") # Seconds to wait for a connection
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE") # Seconds; -1 disables recycling
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_REPLICA_URLS: str = Field(default="", env="DB_REPLICA_URLS") # Comma-separated read replica URLs
+    DB_REPLICA_HEALTH_INTERVAL_SECONDS: float = Field(default=5, env="DB_REPLICA_HEALTH_INTERVAL_SECONDS")
+    DB_REPLICA_MAX_LAG_SECONDS: float = Field(default=30, env="DB_REPLICA_MAX_LAG_SECONDS") # Replicas further behind are skipped
+    # Reads stay on the primary this long after a write; defaults to, and may
+    # not be shorter than, DB_REPLICA_MAX_LAG_SECONDS
+    DB_READ_YOUR_WRITES_SECONDS: Optional[float] = Field(default=None, env="DB_READ_YOUR_WRITES_SECONDS")
+    AUTH_CACHE_TTL_SECONDS: float = Field(default=60, env="AUTH_CACHE_TTL_SECONDS")
+    AUTH_CACHE_MAX_ENTRIES: int = Field(default=10000, env="AUTH_CACHE_MAX_ENTRIES")
+    BCRYPT_ROUNDS: int = Field(default=12, env="BCRYPT_ROUNDS")
+    PASSWORD_HASH_WORKERS: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64, env="PASSWORD_HASH_MAX_PENDING") # Running + queued jobs
+    SQL_INSTRUMENTATION: bool = Field(default=False, env="SQL_INSTRUMENTATION")
+    SQL_SLOW_QUERY_MS: float = Field(default=200, env="SQL_SLOW_QUERY_MS")
+    SQL_EXPLAIN_SAMPLE_RATE: float = Field(default=0.0, env="SQL_EXPLAIN_SAMPLE_RATE") # 0..1 of slow SELECTs
+    SQL_QUERY_BUDGET: int = Field(default=0, env="SQL_QUERY_BUDGET") # Statements per request; 0 disables
+    SQL_QUERY_BUDGET_MODE: str = Field(default="warn", env="SQL_QUERY_BUDGET_MODE") # "warn" or "raise"
+    NOTE_CACHE_BACKEND: str = Field(default="auto", env="NOTE_CACHE_BACKEND") # "auto", "local", "redis" or "none"
+    NOTE_CACHE_MAX_ENTRIES: int = Field(default=10000, env="NOTE_CACHE_MAX_ENTRIES")
+    NOTE_CACHE_TTL_SECONDS: float = Field(default=300, env="NOTE_CACHE_TTL_SECONDS")
+    NOTE_CACHE_REDIS_URL: str = Field(default="redis://localhost:6379/0", env="NOTE_CACHE_REDIS_URL")
+    FAST_JSON: bool = Field(default=True, env="FAST_JSON") # Pre-render note responses via TypeAdapter
+    NOTE_EVENTS_BUFFER_SIZE: int = Field(default=256, env="NOTE_EVENTS_BUFFER_SIZE") # Events buffered per stream connection
+    NOTE_EVENTS_PG_NOTIFY: bool = Field(default=False, env="NOTE_EVENTS_PG_NOTIFY") # Fan out across workers via LISTEN/NOTIFY
+    NOTE_STREAM_HEARTBEAT_SECONDS: float = Field(default=15.0, env="NOTE_STREAM_HEARTBEAT_SECONDS")
+    NOTE_BULK_MAX_ITEMS: int = Field(default=5000, env="NOTE_BULK_MAX_ITEMS")
+    NOTE_BATCH_GET_MAX_IDS: int = Field(default=200, env="NOTE_BATCH_GET_MAX_IDS")
+    NOTE_BATCH_DELETE_MAX_IDS: int = Field(default=5000, env="NOTE_BATCH_DELETE_MAX_IDS")
+    NOTE_BATCH_DELETE_CHUNK_SIZE: int = Field(default=500, env="NOTE_BATCH_DELETE_CHUNK_SIZE") # Notes deleted per transaction
+    NOTE_IMPORT_BATCH_SIZE: int = Field(default=1000, env="NOTE_IMPORT_BATCH_SIZE")
+    NOTE_IMPORT_MAX_LINE_BYTES: int = Field(default=1048576, env="NOTE_IMPORT_MAX_LINE_BYTES")
+    NOTE_IMPORT_MAX_ERRORS: int = Field(default=1000, env="NOTE_IMPORT_MAX_ERRORS") # Errors listed in the response
+    NOTE_EXPORT_BATCH_SIZE: int = Field(default=1000, env="NOTE_EXPORT_BATCH_SIZE")
 
     class Config:
         env_file_encoding = "utf-8"
 
+    @model_validator(mode="after")
+    def check_read_your_writes_window(self) -> "Settings":
+        # A shorter window would let a user read a replica that has not yet
+        # replayed their own write
+        if self.DB_READ_YOUR_WRITES_SECONDS is not None and self.DB_READ_YOUR_WRITES_SECONDS < self.DB_REPLICA_MAX_LAG_SECONDS:
+            raise ValueError("DB_READ_YOUR_WRITES_SECONDS must be at least DB_REPLICA_MAX_LAG_SECONDS")
+        return self
+
+    @property
+    def read_your_writes_seconds(self) -> float:
+        """
+        Effective read-your-writes window for replica routing.
+        """
+        if self.DB_READ_YOUR_WRITES_SECONDS is None:
+            return self.DB_REPLICA_MAX_LAG_SECONDS
+        return self.DB_READ_YOUR_WRITES_SECONDS
+
+    @property
+    def async_database_url(self) -> str:
+        """
+        asyncpg URL for the async engine, derived from DATABASE_URL unless set explicitly.
+        """
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        return asyncpg_url(self.DATABASE_URL)
+
+    @property
+    def replica_urls(self) -> List[str]:
+        """
+        Read replica URLs parsed from DB_REPLICA_URLS.
+        """
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
+def asyncpg_url(url: str) -> str:
+    """
+    Rewrite a Postgres URL to use the asyncpg driver; other URLs are returned as-is.
+    """
+    scheme, _, rest = url.partition("://")
+    return f"postgresql+asyncpg://{rest}" if scheme.startswith("postgresql") else url
+
 settings = Settings()
@@ -6,38 +6,75 @@ Used in FastAPI route dependencies.
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from backend.db.database import get_db
+from backend.db.database import get_db, run_db
+from backend.db import replicas
 from backend.models.user import User
+from backend.core import auth_cache
+from backend.core.auth_cache import AuthenticatedUser
 from backend.core.security import decode_access_token
 
 
 # OAuth2 dependency to extract token from Authorization header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _get_user_by_id(db: Session, user_id: int) -> User | None:
+    return db.query(User).filter(User.id == user_id).first()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> AuthenticatedUser:
     """
     Dependency to get the current logged in user from JWT token.
-    Raises HTTP 401 if token is invalid or user does not exist.
+
+    Tokens carry the user id (``uid``) and token version (``ver``); the user
+    is resolved from the in-process auth cache, so a warm request makes no
+    database round trip. Tokens without them (issued before they were added)
+    cannot be revoked and are rejected, so those clients log in again.
+    Raises HTTP 401 if token is invalid, revoked, or user does not exist.
     """
     payload = decode_access_token(token)
     if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    email: str = payload.get("sub")
-    if email is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return user
+        raise _credentials_exception()
+
+    user_id = payload.get("uid")
+    if user_id is None or payload.get("ver") is None:
+        raise _credentials_exception()
+    principal = auth_cache.get(user_id)
+    if principal is None:
+        user = await run_db(db, _get_user_by_id, user_id)
+        if user is None:
+            raise _credentials_exception("User not found")
+        principal = auth_cache.principal_from_user(user)
+        auth_cache.put(principal)
+    if payload["ver"] != principal.token_version:
+        raise _credentials_exception()
+    # Commits on this request's session count as writes by this user
+    # for replica read-your-writes routing
+    db.info["user_id"] = principal.id
+    return principal
+
+async def get_read_db(db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Dependency yielding a session for read-only routes.
+
+    Serves from a healthy read replica (round-robin) when any are configured
+    and the user has not written within the read-your-writes window;
+    otherwise yields the request's primary session.
+    """
+    replica = replicas.router.pick(current_user.id)
+    if replica is None:
+        yield db
+        return
+    session = replica.session()
+    try:
+        yield session
+    finally:
+        if isinstance(session, Session):
+            session.close()
+        else:
+            await session.close()
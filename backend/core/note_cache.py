@@ -0,0 +1,274 @@
+"""
+Read-through cache of serialized single-note responses.
+
+Entries are keyed by (owner_id, note_id) and hold the rendered JSON body
+together with its ETag and ``updated_at``, so a hit is answered (or turned
+into a 304) without touching the database or re-serializing. Writes in
+``backend.crud.note`` invalidate the affected keys after commit.
+
+A reader that loaded the row before a write committed must not put the
+old version back after the write's invalidation. Readers therefore take a
+``read_started()`` timestamp before querying; ``invalidate`` records when
+each key was invalidated, and ``put`` drops (or immediately removes) an
+entry whose read began before the latest invalidation of its key.
+
+Backends are selected with ``NOTE_CACHE_BACKEND``: ``local`` (bounded
+in-process LRU with TTL), ``redis`` (shared across workers; requires the
+optional ``redis`` package), ``none``, or ``auto`` (the default), which is
+``local`` for a single worker and ``none`` when ``WEB_CONCURRENCY`` asks
+for more. With ``local`` and several workers, a write is only invalidated
+in the worker that handled it, so other workers could serve the old entry
+until its TTL expires.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from backend.core.config import settings
+from backend.utils.cache import TTLCache
+from backend.logger import logger
+
+
+@dataclass(frozen=True)
+class NoteCacheEntry:
+    """
+    A cached, fully rendered note response.
+    """
+    body: bytes
+    etag: str
+    updated_at: Optional[datetime]
+
+    def dumps(self) -> bytes:
+        return json.dumps({
+            "body": self.body.decode("utf-8"),
+            "etag": self.etag,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }).encode("utf-8")
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "NoteCacheEntry":
+        data = json.loads(raw)
+        updated_at = datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None
+        return cls(body=data["body"].encode("utf-8"), etag=data["etag"], updated_at=updated_at)
+
+
+class InvalidationLog:
+    """
+    Per-key invalidation times, each kept for ``ttl`` seconds.
+
+    Unlike the entry cache this has no size bound: marks are only pruned
+    once expired, oldest first, never to make room. An evicted mark would
+    let a reader that started before the write put the old body back.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._marks: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, key: str, at: float) -> None:
+        with self._lock:
+            # Re-inserted at the end so the dict stays ordered by time
+            self._marks.pop(key, None)
+            self._marks[key] = at
+            cutoff = at - self.ttl
+            while self._marks:
+                oldest_key, oldest_at = next(iter(self._marks.items()))
+                if oldest_at > cutoff:
+                    break
+                del self._marks[oldest_key]
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._marks.get(key)
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+
+class LocalBackend:
+    """
+    In-process LRU with TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._invalidations = InvalidationLog(ttl=ttl)
+
+    def get(self, key: str) -> Optional[NoteCacheEntry]:
+        return self._cache.get(key)
+
+    def mark_invalidated(self, key: str, at: float) -> None:
+        self._invalidations.mark(key, at)
+
+    def invalidated_at(self, key: str) -> Optional[float]:
+        return self._invalidations.get(key)
+
+    def set(self, key: str, entry: NoteCacheEntry) -> None:
+        self._cache.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "local", **self._cache.stats()}
+
+
+class RedisBackend:
+    """
+    Shared backend speaking the Redis protocol (GET / SET EX / DEL).
+
+    Any client exposing those three methods works, which lets tests use a
+    local fake. Errors are logged and treated as misses so a Redis outage
+    degrades to database reads instead of failing requests.
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = "note:"):
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[NoteCacheEntry]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Note cache GET failed: %s", e)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return NoteCacheEntry.loads(raw)
+
+    def set(self, key: str, entry: NoteCacheEntry) -> None:
+        try:
+            self.client.set(self.prefix + key, entry.dumps(), ex=self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Note cache SET failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Note cache DEL failed: %s", e)
+
+    def mark_invalidated(self, key: str, at: float) -> None:
+        try:
+            self.client.set(self.prefix + key + ":invalidated", repr(at), ex=self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Note cache SET failed: %s", e)
+
+    def invalidated_at(self, key: str) -> Optional[float]:
+        try:
+            raw = self.client.get(self.prefix + key + ":invalidated")
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Note cache GET failed: %s", e)
+            # Without the marker the put cannot be proven safe
+            return float("inf")
+        return float(raw) if raw is not None else None
+
+    def clear(self) -> None:
+        # Shared keys expire on their own; nothing process-local to drop.
+        pass
+
+    def stats(self) -> dict:
+        # Evictions happen inside Redis and are not visible from here
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses, "evictions": None, "errors": self.errors}
+
+
+def _build_backend():
+    mode = settings.NOTE_CACHE_BACKEND
+    if mode == "auto":
+        mode = "local" if int(os.getenv("WEB_CONCURRENCY", "1")) <= 1 else "none"
+    if mode == "none":
+        return None
+    if mode == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("NOTE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        return RedisBackend(redis.Redis.from_url(settings.NOTE_CACHE_REDIS_URL), ttl=settings.NOTE_CACHE_TTL_SECONDS)
+    return LocalBackend(maxsize=settings.NOTE_CACHE_MAX_ENTRIES, ttl=settings.NOTE_CACHE_TTL_SECONDS)
+
+
+backend = _build_backend()
+
+
+def _key(owner_id: int, note_id: int) -> str:
+    return f"{owner_id}:{note_id}"
+
+
+def get(owner_id: int, note_id: int) -> Optional[NoteCacheEntry]:
+    if backend is None:
+        return None
+    return backend.get(_key(owner_id, note_id))
+
+
+def read_started() -> float:
+    """
+    Timestamp to take before reading a note that may be passed to ``put``.
+    """
+    return time.time()
+
+
+def _invalidated_since(key: str, started: float) -> bool:
+    invalidated = backend.invalidated_at(key)
+    return invalidated is not None and invalidated >= started
+
+
+def put(owner_id: int, note_id: int, entry: NoteCacheEntry, started: float) -> None:
+    """
+    Cache an entry read from the database at ``started`` (see
+    ``read_started``), unless the key was invalidated since.
+    """
+    if backend is None:
+        return
+    key = _key(owner_id, note_id)
+    if _invalidated_since(key, started):
+        return
+    backend.set(key, entry)
+    # An invalidation may have landed between the check and the set
+    if _invalidated_since(key, started):
+        backend.delete(key)
+
+
+def invalidate(owner_id: int, note_id: int) -> None:
+    if backend is not None:
+        key = _key(owner_id, note_id)
+        # Marked before deleting so a concurrent put either sees the mark
+        # or has its entry removed by the delete
+        backend.mark_invalidated(key, time.time())
+        backend.delete(key)
+
+
+def clear() -> None:
+    if backend is not None:
+        backend.clear()
+
+
+def set_backend(new_backend) -> None:
+    """
+    Swap the active backend (e.g. to a fake Redis client in tests).
+    """
+    global backend
+    backend = new_backend
+
+
+def stats() -> Optional[dict]:
+    return backend.stats() if backend is not None else None
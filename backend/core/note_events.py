@@ -0,0 +1,253 @@
+"""
+In-process publish/subscribe of note change events.
+
+The note CRUD publishes a small event (``type``, ``id`` and, for creates
+and updates, ``version``) after each committed write; ``/notes/stream``
+subscribes per connection and forwards the current user's events as
+server-sent events. Publishing may happen on any thread (sync handlers run
+in the threadpool); delivery is handed to the subscriber's event loop.
+
+Each subscription buffers at most ``NOTE_EVENTS_BUFFER_SIZE`` events. A
+subscriber that falls further behind is marked overflowed instead of
+growing without bound; the stream then tells the client to resync from
+``/notes/changes`` and closes.
+
+With ``NOTE_EVENTS_PG_NOTIFY`` enabled, events are sent through Postgres
+``NOTIFY`` on a dedicated connection and every worker ``LISTEN``s, so
+clients connected to any worker see writes made on any other. Local
+subscribers are then fed only from the listener, which avoids duplicates.
+"""
+
+import asyncio
+import json
+import queue
+import select
+import threading
+from typing import Dict, Optional, Set
+from backend.core.config import settings
+from backend.logger import logger
+
+CHANNEL = "note_events"
+
+
+class Subscription:
+    """
+    A bounded event buffer owned by one stream connection.
+    """
+
+    def __init__(self, owner_id: int, maxsize: int):
+        self.owner_id = owner_id
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, event: dict) -> None:
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake the reader so it notices the overflow promptly
+            self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    def push(self, event: dict) -> None:
+        """
+        Hand an event to the subscriber's loop; safe to call from any thread.
+        """
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has closed; the subscription is about to be dropped
+            pass
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Wait for the next event. Returns None on timeout or overflow.
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NoteEventBus:
+    """
+    Routes published events to the subscriptions of the owning user.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self.published = 0
+        self.dropped_subscriptions = 0
+
+    def subscribe(self, owner_id: int) -> Subscription:
+        subscription = Subscription(owner_id, settings.NOTE_EVENTS_BUFFER_SIZE)
+        with self._lock:
+            self._subscriptions.setdefault(owner_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.owner_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.owner_id]
+        if subscription.overflowed:
+            self.dropped_subscriptions += 1
+
+    def dispatch(self, owner_id: int, event: dict) -> None:
+        """
+        Deliver an event to this worker's subscribers of ``owner_id``.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(owner_id, ()))
+        for subscription in subscriptions:
+            subscription.push(event)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = sum(len(s) for s in self._subscriptions.values())
+        return {
+            "subscribers": subscribers,
+            "published": self.published,
+            "dropped_subscriptions": self.dropped_subscriptions,
+        }
+
+
+class PostgresBridge:
+    """
+    Fans events out across workers with Postgres LISTEN/NOTIFY.
+
+    One thread sends queued events with ``pg_notify`` and another listens
+    on the channel and dispatches to the local bus; each uses its own
+    autocommit psycopg2 connection and reconnects after errors.
+    """
+
+    def __init__(self, bus: NoteEventBus, dsn: str):
+        self._bus = bus
+        self._dsn = dsn
+        self._outbox: queue.Queue = queue.Queue(maxsize=settings.NOTE_EVENTS_BUFFER_SIZE * 100)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(self._dsn)
+        connection.autocommit = True
+        return connection
+
+    def send(self, owner_id: int, event: dict) -> None:
+        try:
+            self._outbox.put_nowait((owner_id, event))
+        except queue.Full:
+            logger.warning("Note event outbox full; dropping %s event for note id=%s", event["type"], event["id"])
+
+    def _send_loop(self) -> None:
+        connection = None
+        while not self._stop.is_set():
+            try:
+                item = self._outbox.get(timeout=1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            owner_id, event = item
+            try:
+                if connection is None:
+                    connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, json.dumps({"owner_id": owner_id, **event})))
+            except Exception as e:
+                logger.error("Failed to NOTIFY note event: %s", e)
+                connection = None
+                self._stop.wait(1)
+        if connection is not None:
+            connection.close()
+
+    def _listen_loop(self) -> None:
+        connection = None
+        while not self._stop.is_set():
+            try:
+                if connection is None:
+                    connection = self._connect()
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"LISTEN {CHANNEL}")
+                if select.select([connection], [], [], 1)[0]:
+                    connection.poll()
+                    while connection.notifies:
+                        payload = json.loads(connection.notifies.pop(0).payload)
+                        self._bus.dispatch(payload.pop("owner_id"), payload)
+            except Exception as e:
+                logger.error("Note event listener failed, reconnecting: %s", e)
+                connection = None
+                self._stop.wait(1)
+        if connection is not None:
+            connection.close()
+
+    def start(self) -> None:
+        for target in (self._send_loop, self._listen_loop):
+            thread = threading.Thread(target=target, name=f"note-events-{target.__name__.strip('_')}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Note events LISTEN/NOTIFY bridge started on channel %s", CHANNEL)
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self._outbox.put_nowait(None)
+        except queue.Full:
+            pass
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+
+bus = NoteEventBus()
+bridge: Optional[PostgresBridge] = None
+
+
+def publish(owner_id: int, event_type: str, note_id: int, version: Optional[int] = None) -> None:
+    """
+    Publish a committed note change to ``owner_id``'s subscribers.
+    """
+    event = {"type": event_type, "id": note_id}
+    if version is not None:
+        event["version"] = version
+    bus.published += 1
+    if bridge is not None:
+        bridge.send(owner_id, event)
+    else:
+        bus.dispatch(owner_id, event)
+
+
+def start_bridge(dsn: str) -> None:
+    """
+    Route events through Postgres LISTEN/NOTIFY (see module docstring).
+    """
+    global bridge
+    if bridge is None:
+        bridge = PostgresBridge(bus, dsn)
+        bridge.start()
+
+
+def stop_bridge() -> None:
+    global bridge
+    if bridge is not None:
+        bridge.stop()
+        bridge = None
+
+
+def subscribe(owner_id: int) -> Subscription:
+    return bus.subscribe(owner_id)
+
+
+def unsubscribe(subscription: Subscription) -> None:
+    bus.unsubscribe(subscription)
+
+
+def stats() -> dict:
+    return {**bus.stats(), "pg_notify": bridge is not None}
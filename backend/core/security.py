@@ -4,14 +4,25 @@ Password Hashing and Verification
 JWT creation and decoding
 """
 
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from typing import Optional
+from typing import Optional, Tuple
 from backend.core.config import settings
 
-# Setup password hashing using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Setup password hashing using bcrypt. Pinning min/max rounds to the
+# configured cost makes needs_update() flag hashes made with any other cost,
+# so they are rehashed on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 #Token validity in minutes
@@ -28,6 +39,79 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the password hashing queue is full.
+    """
+    pass
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so a small pool of threads gives real
+    parallelism while keeping password work off the request threadpool and
+    event loop. At most ``max_pending`` jobs may be running or queued; beyond
+    that ``PasswordHasherBusy`` is raised instead of letting a login storm
+    queue unbounded work.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_pending: int):
+        self.context = context
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use, and again after shutdown(), so the hasher
+        # survives an application restarting within the same process
+        # (uvicorn --reload, a new TestClient lifespan).
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Password hashing queue is full")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a password with the configured bcrypt cost.
+        """
+        return await asyncio.wrap_future(self._submit(self.context.hash, password))
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies a password, returning ``(valid, new_hash)``.
+
+        ``new_hash`` is set when the password is valid but the stored hash
+        uses a different cost than configured and should be replaced.
+        """
+        return await asyncio.wrap_future(
+            self._submit(self.context.verify_and_update, plain_password, hashed_password)
+        )
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Creates a signed JWT access token with an optional expiration.
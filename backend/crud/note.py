@@ -4,10 +4,18 @@ CRUD operations for notes and tags.
 This module handles the creation, retrieval, update, and deletion of notes and associated tags.
 """
 
+import io
+from sqlalchemy import BigInteger, Integer, Text, any_, bindparam, cast, delete, func, insert, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from backend.models.note import Note, Tag
-from backend.schemas.note import NoteCreate, NoteUpdate, TagCreate
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import datetime
+from typing import AsyncIterator, Collection, Iterable, Iterator, List, Optional, Tuple
+from backend.models.base import utcnow
+from backend.models.note import Note, NoteTombstone, Tag, note_change_seq, note_tag_association
+from backend.schemas.note import NoteCreate, NotePatch, NoteUpdate, TagCreate
+from backend.core import note_cache, note_events
+from backend.crud.tag import _upsert_insert, adjust_tag_counts, tag_deltas
 from backend.logger import logger
 
 def get_note(db: Session, note_id: int) -> Optional[Note]:
@@ -21,31 +29,366 @@ def get_note(db: Session, note_id: int) -> Optional[Note]:
     Returns:
         Optional[Note]: The note if found, otherwise None.
     """
-    logger.info(f"Fetching note with id={note_id}")
+    logger.info("Fetching note with id=%s", note_id)
     note = db.query(Note).filter(Note.id == note_id).first()
     if note:
-        logger.info(f"Found note with id={note_id}")
+        logger.debug("Found note with id=%s", note_id)
     else:
-        logger.warning(f"Note with id={note_id} not found")
+        logger.warning("Note with id=%s not found", note_id)
     return note
 
-def get_notes(db: Session, skip: int = 0, limit: int = 100) -> List[Note]:
+def get_owned_note(db: Session, note_id: int, owner_id: int) -> Optional[Note]:
     """
-    Retrieve a list of notes with pagination.
+    Retrieve a note by its ID, only if it belongs to the given user.
 
     Args:
         db (Session): SQLAlchemy database session.
-        skip (int): Number of records to skip.
+        note_id (int): ID of the note to fetch.
+        owner_id (int): ID of the user who must own the note.
+
+    Returns:
+        Optional[Note]: The note if found and owned, otherwise None.
+    """
+    return db.query(Note).filter(Note.id == note_id, Note.owner_id == owner_id).first()
+
+def get_notes_by_ids(db: Session, owner_id: int, ids: List[int]) -> List[Note]:
+    """
+    Retrieve many owned notes by ID with one note query and one tag load.
+
+    On Postgres the ids are sent as a single array parameter
+    (``WHERE id = ANY(:ids)``), so the statement text is the same for any
+    number of ids; other engines use ``IN``.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): ID of the user who must own the notes.
+        ids (List[int]): Note IDs to fetch.
+
+    Returns:
+        List[Note]: The owned notes found, in the order of ``ids`` (duplicates removed).
+    """
+    wanted = list(dict.fromkeys(ids))
+    if not wanted:
+        return []
+    logger.info("Fetching %s notes by id for owner_id=%s", len(wanted), owner_id)
+    if db.get_bind().dialect.name == "postgresql":
+        id_filter = Note.id == any_(bindparam("ids", wanted, type_=postgresql.ARRAY(Integer)))
+    else:
+        id_filter = Note.id.in_(wanted)
+    found = {note.id: note for note in db.query(Note).filter(Note.owner_id == owner_id, id_filter)}
+    return [found[note_id] for note_id in wanted if note_id in found]
+
+def get_note_validator(db: Session, note_id: int, owner_id: int) -> Optional[Tuple[int, datetime]]:
+    """
+    Fetch only the cache validators of an owned note, without loading tags.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        note_id (int): ID of the note.
+        owner_id (int): ID of the user who must own the note.
+
+    Returns:
+        Optional[Tuple[int, datetime]]: ``(version, updated_at)`` or None if not found.
+    """
+    row = db.query(Note.version, Note.updated_at).filter(Note.id == note_id, Note.owner_id == owner_id).first()
+    return tuple(row) if row else None
+
+def _tagged_note_ids(tags: List[str], match_all: bool):
+    """
+    Subquery of note ids carrying any (or all) of ``tags``.
+
+    Both forms read only the (tag_id, note_id) index of the association
+    table; "all" counts matching tags per note, which is exact because
+    (note_id, tag_id) is the primary key.
+    """
+    names = list(dict.fromkeys(tags))
+    stmt = (
+        select(note_tag_association.c.note_id)
+        .join(Tag, Tag.id == note_tag_association.c.tag_id)
+        .where(Tag.name.in_(names))
+    )
+    if match_all and len(names) > 1:
+        stmt = stmt.group_by(note_tag_association.c.note_id).having(func.count() == len(names))
+    return stmt
+
+def _notes_page(
+    query,
+    owner_id: Optional[int],
+    skip: int,
+    limit: int,
+    after_id: Optional[int],
+    tags: Optional[List[str]] = None,
+    match_all: bool = False,
+):
+    if owner_id is not None:
+        query = query.filter(Note.owner_id == owner_id)
+    if tags:
+        query = query.filter(Note.id.in_(_tagged_note_ids(tags, match_all)))
+    # Ordering must be applied before OFFSET/LIMIT; Query refuses it after
+    query = query.order_by(Note.id)
+    if after_id is not None:
+        query = query.filter(Note.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def get_notes(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    match_all: bool = False,
+) -> List[Note]:
+    """
+    Retrieve a list of notes ordered by id.
+
+    Supports two pagination modes: offset (``skip``) for older clients, and
+    keyset (``after_id``) which seeks directly past the last seen id so every
+    page costs the same regardless of depth.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        skip (int): Number of records to skip (ignored when after_id is given).
         limit (int): Maximum number of records to return.
+        owner_id (Optional[int]): Restrict results to notes owned by this user.
+        after_id (Optional[int]): Return only notes with an id greater than this.
+        tags (Optional[List[str]]): Return only notes carrying these tag names.
+        match_all (bool): Require every tag in ``tags`` rather than any of them.
 
     Returns:
         List[Note]: List of notes.
     """
-    logger.info(f"Fetching notes with skip={skip}, limit= {limit}")
-    notes = db.query(Note).offset(skip).limit(limit).all()
-    logger.info(f"Fetched {len(notes)} notes")
+    logger.info(
+        "Fetching notes with skip=%s, limit=%s, owner_id=%s, after_id=%s, tags=%s, match_all=%s",
+        skip, limit, owner_id, after_id, tags, match_all,
+    )
+    notes = _notes_page(db.query(Note), owner_id, skip, limit, after_id, tags, match_all).all()
+    logger.debug("Fetched %s notes", len(notes))
+    return notes
+
+def get_notes_validators(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    match_all: bool = False,
+) -> List[Tuple[int, int]]:
+    """
+    Fetch ``(id, version)`` for the page ``get_notes`` would return with the
+    same arguments, without loading note bodies or tags.
+    """
+    query = db.query(Note.id, Note.version)
+    return [tuple(row) for row in _notes_page(query, owner_id, skip, limit, after_id, tags, match_all).all()]
+
+def search_notes(db: Session, owner_id: int, q: str, skip: int = 0, limit: int = 10) -> List[Note]:
+    """
+    Full-text search over a user's notes, best matches first.
+
+    On Postgres this matches ``websearch_to_tsquery`` against the generated,
+    GIN-indexed ``search_vector`` column and ranks with ``ts_rank_cd``.
+    Other engines fall back to a case-insensitive substring match on title
+    and content ordered by id.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): Only notes owned by this user are searched.
+        q (str): Search query in web-search syntax.
+        skip (int): Number of results to skip.
+        limit (int): Maximum number of results to return.
+
+    Returns:
+        List[Note]: Matching notes.
+    """
+    logger.info("Searching notes for owner_id=%s with q='%s', skip=%s, limit=%s", owner_id, q, skip, limit)
+    query = db.query(Note).filter(Note.owner_id == owner_id)
+    if db.get_bind().dialect.name == "postgresql":
+        search_vector = literal_column("notes.search_vector")
+        ts_query = func.websearch_to_tsquery("english", q)
+        query = query.filter(search_vector.op("@@")(ts_query)).order_by(
+            func.ts_rank_cd(search_vector, ts_query).desc(), Note.id
+        )
+    else:
+        pattern = f"%{q}%"
+        query = query.filter(or_(Note.title.ilike(pattern), Note.content.ilike(pattern))).order_by(Note.id)
+    notes = query.offset(skip).limit(limit).all()
+    logger.debug("Search returned %s notes", len(notes))
     return notes
 
+def _export_statement(owner_id: int, batch_size: int):
+    return (
+        select(Note.id, Note.title, Note.content, Note.created_at, Note.updated_at)
+        .where(Note.owner_id == owner_id)
+        .order_by(Note.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+def _tags_statement(note_ids: List[int]):
+    return (
+        select(note_tag_association.c.note_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == note_tag_association.c.tag_id)
+        .where(note_tag_association.c.note_id.in_(note_ids))
+        .order_by(note_tag_association.c.note_id, Tag.id)
+    )
+
+def _attach_tags(rows, tag_rows) -> List[dict]:
+    tags_by_note = {}
+    for note_id, tag_id, name in tag_rows:
+        tags_by_note.setdefault(note_id, []).append({"id": tag_id, "name": name})
+    return [{**row._asdict(), "tags": tags_by_note.get(row.id, [])} for row in rows]
+
+def iter_export_batches(db: Session, owner_id: int, batch_size: int = 1000) -> Iterator[List[dict]]:
+    """
+    Stream all of a user's notes, with tags, in batches.
+
+    Notes are read through a server-side cursor (``yield_per``) so memory is
+    bounded by ``batch_size`` however many notes the user has; tags for each
+    batch are fetched with a single ``IN`` query.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): ID of the user whose notes are exported.
+        batch_size (int): Rows fetched per round trip.
+
+    Yields:
+        List[dict]: Note dicts with a ``tags`` list, in id order.
+    """
+    logger.info("Exporting notes for owner_id=%s", owner_id)
+    result = db.execute(_export_statement(owner_id, batch_size))
+    for rows in result.partitions():
+        yield _attach_tags(rows, db.execute(_tags_statement([row.id for row in rows])).all())
+
+async def aiter_export_batches(db, owner_id: int, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+    """
+    ``AsyncSession`` counterpart of ``iter_export_batches``.
+    """
+    logger.info("Exporting notes for owner_id=%s", owner_id)
+    result = await db.stream(_export_statement(owner_id, batch_size))
+    async for rows in result.partitions():
+        tag_rows = (await db.execute(_tags_statement([row.id for row in rows]))).all()
+        yield _attach_tags(rows, tag_rows)
+
+def _record_tombstones(db: Session, owner_id: int, note_ids: List[int]) -> None:
+    if note_ids:
+        db.execute(insert(NoteTombstone).values([
+            {"note_id": note_id, "owner_id": owner_id, "change_seq": note_change_seq.next_value(), "deleted_at": utcnow()}
+            for note_id in note_ids
+        ]))
+
+def get_changes(
+    db: Session, owner_id: int, since: Tuple[int, int] = (0, 0), limit: int = 100
+) -> Tuple[List[Note], List[int], Tuple[int, int], bool]:
+    """
+    Retrieve a user's note changes after a position in the change feed.
+
+    Every note write stamps the row with its transaction id and the next
+    value of ``note_change_seq``, and every delete records a tombstone the
+    same way; changes are ordered by ``(change_xid, change_seq)``. Both
+    lookups seek an ``(owner_id, change_xid, change_seq)`` index; the cost
+    depends on the number of changes returned, not on how many notes the
+    user has.
+
+    Only changes from transactions older than the snapshot's ``xmin`` are
+    returned. Every transaction below it has finished and every one that
+    may still commit is at or above it, so no change can later appear
+    behind the returned position.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): ID of the user whose changes are returned.
+        since (Tuple[int, int]): Return only changes after this ``(change_xid, change_seq)``.
+        limit (int): Maximum number of changes (notes plus deletions) to return.
+
+    Returns:
+        Tuple[List[Note], List[int], Tuple[int, int], bool]: Created or
+        updated notes and deleted note IDs, each in change order; the
+        position to resume from; and whether more changes are waiting.
+    """
+    logger.info("Fetching note changes for owner_id=%s since=%s limit=%s", owner_id, since, limit)
+    # Read once: the two lookups below run under separate snapshots
+    horizon = db.execute(select(cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger))).scalar_one()
+    notes = (
+        db.query(Note)
+        .filter(
+            Note.owner_id == owner_id,
+            tuple_(Note.change_xid, Note.change_seq) > tuple_(*since),
+            Note.change_xid < horizon,
+        )
+        .order_by(Note.change_xid, Note.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    tombstones = db.execute(
+        select(NoteTombstone.change_xid, NoteTombstone.change_seq, NoteTombstone.note_id)
+        .where(
+            NoteTombstone.owner_id == owner_id,
+            tuple_(NoteTombstone.change_xid, NoteTombstone.change_seq) > tuple_(*since),
+            NoteTombstone.change_xid < horizon,
+        )
+        .order_by(NoteTombstone.change_xid, NoteTombstone.change_seq)
+        .limit(limit + 1)
+    ).all()
+
+    # Each list holds the first limit + 1 changes of its kind, so together
+    # they contain the first limit + 1 changes overall.
+    merged = sorted(
+        [((note.change_xid, note.change_seq), note, None) for note in notes]
+        + [((xid, seq), None, note_id) for xid, seq, note_id in tombstones],
+        key=lambda change: change[0],
+    )
+    page = merged[:limit]
+    next_since = page[-1][0] if page else since
+    changed = [note for _, note, _ in page if note is not None]
+    deleted = [note_id for _, note, note_id in page if note is None]
+    return changed, deleted, next_since, len(merged) > limit
+
+def resolve_tags(db: Session, names: Iterable[str]) -> List[Tag]:
+    """
+    Resolve tag names to Tag rows in a fixed number of statements.
+
+    Existing tags are fetched with a single ``WHERE name IN (...)``; missing
+    ones are created with one ``INSERT ... ON CONFLICT DO NOTHING RETURNING``.
+    New names are inserted in sorted order so concurrent writers cannot
+    deadlock, and names inserted concurrently by another transaction are
+    picked up by a final re-select. Nothing is committed, so the tags join the caller's
+    transaction.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        names (Iterable[str]): Tag names, duplicates allowed.
+
+    Returns:
+        List[Tag]: One Tag per distinct name, in first-seen order.
+    """
+    wanted = list(dict.fromkeys(names))
+    if not wanted:
+        return []
+
+    found = {tag.name: tag for tag in db.scalars(select(Tag).where(Tag.name.in_(wanted)))}
+    # Sorted so concurrent writers take the unique index locks in one order
+    # (as adjust_tag_counts does) instead of deadlocking on each other
+    missing = sorted(name for name in wanted if name not in found)
+    if missing:
+        logger.info("Creating %s new tag(s): %s", len(missing), missing)
+        stmt = (
+            _upsert_insert(db, Tag)
+            .values([{"name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Tag)
+        )
+        for tag in db.scalars(stmt):
+            found[tag.name] = tag
+
+        raced = [name for name in missing if name not in found]
+        if raced:
+            for tag in db.scalars(select(Tag).where(Tag.name.in_(raced))):
+                found[tag.name] = tag
+
+    return [found[name] for name in wanted]
+
 def create_note(db: Session, note_in: NoteCreate, owner_id: int) -> Note:
     """
     Create a new note, creating any new tags as necessary.
@@ -58,18 +401,9 @@ def create_note(db: Session, note_in: NoteCreate, owner_id: int) -> Note:
     Returns:
         Note: The created note object.
     """
-    logger.info(f"Creating note titled '{note_in.title}' for owner_id={owner_id}")
-    tags = []
+    logger.info("Creating note titled '%s' for owner_id=%s", note_in.title, owner_id)
     try:
-        for tag_in in note_in.tags or []:
-            tag = db.query(Tag).filter(Tag.name == tag_in.name).first()
-            if not tag:
-                logger.info(f"Tag '{tag_in.name}' not found, creating new tag")
-                tag = Tag(name=tag_in.name)
-                db.add(tag)
-                db.commit()
-                db.refresh(tag)
-            tags.append(tag)
+        tags = resolve_tags(db, (tag_in.name for tag_in in note_in.tags or []))
 
         db_note = Note(
             title=note_in.title,
@@ -78,12 +412,114 @@ def create_note(db: Session, note_in: NoteCreate, owner_id: int) -> Note:
             tags=tags
         )
         db.add(db_note)
+        adjust_tag_counts(db, owner_id, tag_deltas(added=(tag.id for tag in tags)))
         db.commit()
         db.refresh(db_note)
-        logger.info(f"Note created with id={db_note.id}")
+        note_events.publish(owner_id, "created", db_note.id, db_note.version)
+        logger.info("Note created with id=%s", db_note.id)
         return db_note
     except Exception as e:
-        logger.error(f"Error creating note titled '{note_in.title}': {e}", exc_info=True)
+        logger.error("Error creating note titled '%s': %s", note_in.title, e, exc_info=True)
+        db.rollback()
+        raise
+
+def _copy_field(value) -> str:
+    # COPY's CSV format reads an unquoted empty field as NULL and a quoted
+    # one as an empty string, so None stays bare and text is always quoted.
+    if value is None:
+        return ""
+    if isinstance(value, int):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _copy_rows(db: Session, table: str, columns: Tuple[str, ...], rows: Iterable[tuple]) -> None:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    dbapi_connection = db.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _copy_notes(db: Session, notes_in: List[NoteCreate], owner_id: int) -> List[int]:
+    """
+    Insert notes with COPY. COPY cannot return generated keys, so ids are
+    reserved from the sequence first and written explicitly.
+    """
+    note_ids = list(db.scalars(
+        select(func.nextval(func.pg_get_serial_sequence("notes", "id"))).select_from(
+            func.generate_series(1, len(notes_in))
+        )
+    ))
+    now = utcnow().isoformat()
+    _copy_rows(
+        db,
+        "notes",
+        ("id", "title", "content", "owner_id", "created_at", "updated_at", "version"),
+        ((note_id, n.title, n.content, owner_id, now, now, 1) for note_id, n in zip(note_ids, notes_in)),
+    )
+    return note_ids
+
+def supports_copy(db: Session) -> bool:
+    """
+    Whether COPY FROM STDIN is available (Postgres via psycopg2).
+    """
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+def create_notes_bulk(db: Session, notes_in: List[NoteCreate], owner_id: int, use_copy: bool = False) -> List[int]:
+    """
+    Create many notes in a single transaction.
+
+    Tags for the whole batch are resolved in one pass, notes are written with
+    one multi-row INSERT ... RETURNING id, and association rows with one
+    executemany, so the statement count does not grow with the batch size.
+    With ``use_copy`` (Postgres/psycopg2 only, see ``supports_copy``) notes
+    and association rows are streamed with COPY instead.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        notes_in (List[NoteCreate]): Validated notes to create.
+        owner_id (int): ID of the user who owns the notes.
+        use_copy (bool): Load rows with COPY FROM STDIN.
+
+    Returns:
+        List[int]: IDs of the created notes, in input order.
+    """
+    if not notes_in:
+        return []
+    logger.info("Bulk creating %s notes for owner_id=%s", len(notes_in), owner_id)
+    try:
+        tags = resolve_tags(db, (tag_in.name for note_in in notes_in for tag_in in note_in.tags or []))
+        tag_ids = {tag.name: tag.id for tag in tags}
+
+        if use_copy:
+            note_ids = _copy_notes(db, notes_in, owner_id)
+        else:
+            note_ids = list(db.scalars(
+                insert(Note).returning(Note.id, sort_by_parameter_order=True),
+                [{"title": n.title, "content": n.content, "owner_id": owner_id} for n in notes_in],
+            ))
+
+        associations = [
+            {"note_id": note_id, "tag_id": tag_ids[name]}
+            for note_id, note_in in zip(note_ids, notes_in)
+            for name in dict.fromkeys(tag_in.name for tag_in in note_in.tags or [])
+        ]
+        if associations and use_copy:
+            _copy_rows(db, "note_tag_association", ("note_id", "tag_id"), ((a["note_id"], a["tag_id"]) for a in associations))
+        elif associations:
+            db.execute(insert(note_tag_association), associations)
+        adjust_tag_counts(db, owner_id, tag_deltas(added=(a["tag_id"] for a in associations)))
+
+        db.commit()
+        for note_id in note_ids:
+            note_events.publish(owner_id, "created", note_id, 1)
+        logger.info("Bulk created %s notes for owner_id=%s", len(note_ids), owner_id)
+        return note_ids
+    except Exception as e:
+        logger.error("Error bulk creating notes for owner_id=%s: %s", owner_id, e, exc_info=True)
         db.rollback()
         raise
 
@@ -91,6 +527,10 @@ def update_note(db: Session, note: Note, note_in: NoteUpdate) -> Note:
     """
     Update an existing note and its tags.
 
+    ``updated_at`` is always set so the row is written (and ``version``
+    bumped) even when only tags change. If another writer bumped the version
+    since ``note`` was loaded, ``StaleDataError`` is raised.
+
     Args:
         db (Session): SQLAlchemy database session.
         note (Note): Existing note object.
@@ -99,31 +539,137 @@ def update_note(db: Session, note: Note, note_in: NoteUpdate) -> Note:
     Returns:
         Note: The updated note object.
     """
-    logger.info(f"Updating note id={note.id}")
+    note_id, owner_id = note.id, note.owner_id
+    logger.info("Updating note id=%s", note_id)
     try:
         note.title = note_in.title
         note.content = note_in.content
 
         if note_in.tags is not None:
-            tags = []
-            for tag_in in note_in.tags:
-                tag = db.query(Tag).filter(Tag.name == tag_in.name).first()
-                if not tag:
-                    logger.info(f"Tag '{tag_in.name}' not found, creating new tag")
-                    tag = Tag(name=tag_in.name)
-                    db.add(tag)
-                    db.commit()
-                    db.refresh(tag)
-                tags.append(tag)
-            note.tags = tags
+            old_tag_ids = {tag.id for tag in note.tags}
+            note.tags = resolve_tags(db, (tag_in.name for tag_in in note_in.tags))
+            new_tag_ids = {tag.id for tag in note.tags}
+            adjust_tag_counts(db, owner_id, tag_deltas(added=new_tag_ids - old_tag_ids, removed=old_tag_ids - new_tag_ids))
+        note.updated_at = utcnow()
 
         db.add(note)
         db.commit()
+        note_cache.invalidate(owner_id, note_id)
         db.refresh(note)
-        logger.info(f"Note id={note.id} updated successfully")
+        note_events.publish(owner_id, "updated", note_id, note.version)
+        logger.info("Note id=%s updated successfully", note.id)
         return note
+    except StaleDataError:
+        logger.warning("Concurrent update detected for note id=%s", note_id)
+        db.rollback()
+        raise
     except Exception as e:
-        logger.error(f"Error updating note id={note.id}: {e}", exc_info=True)
+        logger.error("Error updating note id=%s: %s", note.id, e, exc_info=True)
+        db.rollback()
+        raise
+
+_NOTE_COLUMNS = (Note.id, Note.title, Note.content, Note.created_at, Note.updated_at, Note.version)
+
+def _apply_tag_diff(db: Session, note_id: int, owner_id: int, add: List[str], remove: List[str]) -> None:
+    """
+    Detach and attach tags by name with set-based statements, adjusting tag
+    usage counts only for associations that actually changed.
+    """
+    removed = []
+    if remove:
+        removed = db.scalars(
+            delete(note_tag_association)
+            .where(
+                note_tag_association.c.note_id == note_id,
+                note_tag_association.c.tag_id.in_(select(Tag.id).where(Tag.name.in_(remove))),
+            )
+            .returning(note_tag_association.c.tag_id)
+        ).all()
+    added = []
+    if add:
+        tags = resolve_tags(db, add)
+        added = db.scalars(
+            _upsert_insert(db, note_tag_association)
+            .values([{"note_id": note_id, "tag_id": tag.id} for tag in tags])
+            .on_conflict_do_nothing()
+            .returning(note_tag_association.c.tag_id)
+        ).all()
+    adjust_tag_counts(db, owner_id, tag_deltas(added=added, removed=removed))
+
+def patch_note(
+    db: Session,
+    note_id: int,
+    owner_id: int,
+    patch: NotePatch,
+    expected_versions: Optional[Collection[int]] = None,
+) -> Optional[dict]:
+    """
+    Apply a partial update to an owned note.
+
+    Only fields set in ``patch`` are written, with a single
+    ``UPDATE ... RETURNING`` that also bumps ``version`` and ``updated_at``
+    (the ORM's version counter is bypassed, so it is incremented here).
+    Tag changes are applied as add/remove diffs; ``patch.tags`` is diffed
+    against the current tags rather than replacing them wholesale. The
+    result is rebuilt from the returned row plus one tag query, so no
+    refresh is needed.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        note_id (int): ID of the note to patch.
+        owner_id (int): ID of the user who must own the note.
+        patch (NotePatch): Partial update; unset fields are left untouched.
+        expected_versions (Optional[Collection[int]]): If given, only apply
+            the patch when the note's current version is one of these.
+
+    Returns:
+        Optional[dict]: The patched note, or None if no owned note matched
+        (including a version mismatch).
+    """
+    values = patch.model_dump(exclude_unset=True, include={"title", "content"})
+    add = [tag_in.name for tag_in in patch.add_tags]
+    remove = list(patch.remove_tags)
+    logger.info("Patching note id=%s fields=%s add_tags=%s remove_tags=%s", note_id, sorted(values), add, remove)
+
+    conditions = [Note.id == note_id, Note.owner_id == owner_id]
+    if expected_versions is not None:
+        conditions.append(Note.version.in_(list(expected_versions)))
+    try:
+        if not values and not add and not remove and patch.tags is None:
+            row = db.execute(select(*_NOTE_COLUMNS).where(*conditions)).first()
+            return _attach_tags([row], db.execute(_tags_statement([note_id])).all())[0] if row else None
+
+        row = db.execute(
+            update(Note)
+            .where(*conditions)
+            .values(**values, version=Note.version + 1, updated_at=utcnow())
+            .returning(*_NOTE_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            db.rollback()
+            return None
+
+        if patch.tags is not None:
+            current = set(db.scalars(
+                select(Tag.name)
+                .join(note_tag_association, note_tag_association.c.tag_id == Tag.id)
+                .where(note_tag_association.c.note_id == note_id)
+            ))
+            wanted = list(dict.fromkeys(tag_in.name for tag_in in patch.tags))
+            add = [name for name in wanted if name not in current] + add
+            remove = [name for name in current if name not in wanted] + remove
+        if add or remove:
+            _apply_tag_diff(db, note_id, owner_id, add, remove)
+
+        tag_rows = db.execute(_tags_statement([note_id])).all()
+        db.commit()
+        note_cache.invalidate(owner_id, note_id)
+        note_events.publish(owner_id, "updated", note_id, row.version)
+        logger.info("Note id=%s patched to version=%s", note_id, row.version)
+        return _attach_tags([row], tag_rows)[0]
+    except Exception as e:
+        logger.error("Error patching note id=%s: %s", note_id, e, exc_info=True)
         db.rollback()
         raise
 
@@ -135,12 +681,90 @@ def delete_note(db: Session, note: Note) -> None:
         db (Session): SQLAlchemy database session.
         note (Note): The note object to delete.
     """
-    logger.info(f"Deleting note id={note.id}")
+    note_id, owner_id = note.id, note.owner_id
+    logger.info("Deleting note id=%s", note_id)
     try:
+        adjust_tag_counts(db, owner_id, tag_deltas(removed=(tag.id for tag in note.tags)))
+        _record_tombstones(db, owner_id, [note_id])
         db.delete(note)
         db.commit()
-        logger.info(f"Note id={note.id} deleted successfully")
+        note_cache.invalidate(owner_id, note_id)
+        note_events.publish(owner_id, "deleted", note_id)
+        logger.info("Note id=%s deleted successfully", note_id)
+    except Exception as e:
+        logger.error("Error deleting note id=%s: %s", note_id, e, exc_info=True)
+        db.rollback()
+        raise
+
+def delete_notes(
+    db: Session,
+    owner_id: int,
+    ids: Optional[List[int]] = None,
+    tag: Optional[str] = None,
+    created_before: Optional[datetime] = None,
+    chunk_size: int = 500,
+) -> int:
+    """
+    Delete a user's notes matching all given criteria with set-based statements.
+
+    Matching notes are processed ``chunk_size`` at a time in id order. Each
+    chunk deletes its association rows and notes with one statement each,
+    adjusts tag usage counts, and commits, so a large delete never holds
+    row locks for longer than one chunk. Deletes of up to ``chunk_size``
+    notes are therefore a single transaction.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): Only notes owned by this user are deleted.
+        ids (Optional[List[int]]): Restrict to these note IDs.
+        tag (Optional[str]): Restrict to notes carrying this tag name.
+        created_before (Optional[datetime]): Restrict to notes created before this time.
+        chunk_size (int): Notes deleted per transaction.
+
+    Returns:
+        int: Number of notes deleted.
+    """
+    logger.info("Batch deleting notes for owner_id=%s ids=%s tag=%s created_before=%s",
+                owner_id, None if ids is None else len(ids), tag, created_before)
+    if ids is not None and not ids:
+        return 0
+    matching = select(Note.id).where(Note.owner_id == owner_id)
+    if ids is not None:
+        matching = matching.where(Note.id.in_(ids))
+    if tag is not None:
+        matching = matching.where(Note.id.in_(_tagged_note_ids([tag], match_all=False)))
+    if created_before is not None:
+        matching = matching.where(Note.created_at < created_before)
+
+    deleted, last_id = 0, None
+    try:
+        while True:
+            chunk_query = matching if last_id is None else matching.where(Note.id > last_id)
+            chunk = db.scalars(chunk_query.order_by(Note.id).limit(chunk_size).with_for_update()).all()
+            if not chunk:
+                break
+            last_id = chunk[-1]
+
+            removed_tags = db.scalars(
+                delete(note_tag_association)
+                .where(note_tag_association.c.note_id.in_(chunk))
+                .returning(note_tag_association.c.tag_id)
+            ).all()
+            deleted += db.execute(
+                delete(Note).where(Note.id.in_(chunk)).execution_options(synchronize_session=False)
+            ).rowcount
+            adjust_tag_counts(db, owner_id, tag_deltas(removed=removed_tags))
+            _record_tombstones(db, owner_id, chunk)
+            db.commit()
+            for note_id in chunk:
+                note_cache.invalidate(owner_id, note_id)
+                note_events.publish(owner_id, "deleted", note_id)
+            logger.debug("Deleted chunk of %s notes up to id=%s", len(chunk), last_id)
+            if len(chunk) < chunk_size:
+                break
     except Exception as e:
-        logger.error(f"Error deleting note id={note.id}: {e}", exc_info=True)
+        logger.error("Error batch deleting notes for owner_id=%s: %s", owner_id, e, exc_info=True)
         db.rollback()
         raise
+    logger.info("Batch deleted %s notes for owner_id=%s", deleted, owner_id)
+    return deleted
@@ -0,0 +1,111 @@
+"""
+CRUD operations for tags and per-user tag usage counts.
+
+Usage counts live in the ``tag_usage`` table and are adjusted by the note
+CRUD inside the same transaction as each note write.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, contains_eager
+from backend.models.note import Note, Tag, TagUsage, note_tag_association
+from backend.logger import logger
+
+def _upsert_insert(db: Session, table):
+    """
+    Return a dialect-specific INSERT construct that supports ON CONFLICT.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+def get_tags(db: Session, owner_id: int) -> List[TagUsage]:
+    """
+    Retrieve the tags used by a user's notes, with their note counts.
+
+    Reads only the user's ``tag_usage`` rows; nothing is counted at read time.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): ID of the user.
+
+    Returns:
+        List[TagUsage]: Usage rows with a positive count, ordered by tag name.
+    """
+    logger.info("Fetching tags for owner_id=%s", owner_id)
+    return list(db.scalars(
+        select(TagUsage)
+        .join(TagUsage.tag)
+        # Reuse the ordering join to load the tag instead of a second joined eager load
+        .options(contains_eager(TagUsage.tag))
+        .where(TagUsage.owner_id == owner_id, TagUsage.note_count > 0)
+        .order_by(Tag.name)
+    ))
+
+def tag_deltas(added: Iterable[int] = (), removed: Iterable[int] = ()) -> Dict[int, int]:
+    """
+    Build a ``{tag_id: delta}`` mapping from tag ids gained and lost.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    return {tag_id: delta for tag_id, delta in deltas.items() if delta}
+
+def adjust_tag_counts(db: Session, owner_id: int, deltas: Dict[int, int]) -> None:
+    """
+    Apply count changes to a user's tag usage rows without committing.
+
+    All changes go out as one ``INSERT ... ON CONFLICT DO UPDATE SET
+    note_count = note_count + excluded.note_count``, so concurrent writers
+    never lose increments. Rows are written in tag id order to keep lock
+    ordering consistent between transactions.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (int): ID of the user whose counts change.
+        deltas (Dict[int, int]): Change in note count per tag id.
+    """
+    rows = [{"owner_id": owner_id, "tag_id": tag_id, "note_count": delta} for tag_id, delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    stmt = _upsert_insert(db, TagUsage).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id", "tag_id"],
+        set_={"note_count": TagUsage.note_count + stmt.excluded.note_count},
+    )
+    db.execute(stmt)
+
+def rebuild_tag_counts(db: Session, owner_id: Optional[int] = None) -> int:
+    """
+    Recompute tag usage counts from the notes themselves.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        owner_id (Optional[int]): Only rebuild this user's counts; all users if None.
+
+    Returns:
+        int: Number of usage rows written.
+    """
+    logger.info("Rebuilding tag counts for owner_id=%s", "all" if owner_id is None else owner_id)
+    counts = (
+        select(Note.owner_id, note_tag_association.c.tag_id, func.count())
+        .join(note_tag_association, note_tag_association.c.note_id == Note.id)
+        .group_by(Note.owner_id, note_tag_association.c.tag_id)
+    )
+    clear = delete(TagUsage)
+    if owner_id is not None:
+        counts = counts.where(Note.owner_id == owner_id)
+        clear = clear.where(TagUsage.owner_id == owner_id)
+    try:
+        db.execute(clear)
+        written = db.execute(
+            insert(TagUsage).from_select(["owner_id", "tag_id", "note_count"], counts)
+        ).rowcount
+        db.commit()
+        logger.info("Rebuilt %s tag usage rows", written)
+        return written
+    except Exception as e:
+        logger.error("Error rebuilding tag counts: %s", e, exc_info=True)
+        db.rollback()
+        raise
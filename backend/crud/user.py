@@ -7,39 +7,10 @@ Handles user creation, retrieval, updating, and password verification.
 from sqlalchemy.orm import Session
 from backend.models.user import User
 from backend.schemas.user import UserCreate, UserUpdate
-from passlib.context import CryptContext
+from backend.core import auth_cache
+from backend.core.security import get_password_hash
 from backend.logger import logger
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    """
-    Hash a plain text password.
-
-    Args:
-        password (str): The user's password in plain text.
-
-    Returns:
-        str: The hashed password.
-    """
-    logger.debug("Hashing Password")
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify a plain text password against its hash.
-
-    Args:
-        plain_password (str): Plain text password.
-        hashed_password (str): Hashed password stored in DB.
-
-    Returns:
-        bool: True if valid, else False.
-    """
-    logger.debug("Veryfing Password")
-    return pwd_context.verify(plain_password, hashed_password)
-
 def get_user(db: Session, user_id: int) -> User | None:
     """
     Retrieve a user by ID.
@@ -51,12 +22,12 @@ def get_user(db: Session, user_id: int) -> User | None:
     Returns:
         User | None: User object if found, otherwise None.
     """
-    logger.info(f"Fetching user with id={user_id}")
+    logger.info("Fetching user with id=%s", user_id)
     user = db.query(User).filter(User.id == user_id).first()
     if user:
-        logger.info(f"User Found: id={user.id}, username={user.username}")
+        logger.debug("User Found: id=%s, username=%s", user.id, user.username)
     else:
-        logger.warning(f"User not found with id = {user_id}")
+        logger.warning("User not found with id = %s", user_id)
     return user
 
 def get_user_by_email(db: Session, email: str) -> User | None:
@@ -70,12 +41,12 @@ def get_user_by_email(db: Session, email: str) -> User | None:
     Returns:
         User | None: User object if found, otherwise None.
     """
-    logger.info(f"Looking up user by email: {email}")
+    logger.info("Looking up user by email: %s", email)
     user = db.query(User).filter(User.email == email).first()
     if user:
-        logger.info(f"User found with email: {email}")
+        logger.debug("User found with email: %s", email)
     else:
-        logger.warning(f"No user found with email: {email}")
+        logger.warning("No user found with email: %s", email)
     return user 
 
 def get_user_by_username(db: Session, username: str) -> User | None:
@@ -89,28 +60,31 @@ def get_user_by_username(db: Session, username: str) -> User | None:
     Returns:
         User | None: User object if found, otherwise None.
     """
-    logger.info(f"Looking up user by username: {username}")
+    logger.info("Looking up user by username: %s", username)
     user = db.query(User).filter(User.username == username).first()
     if user:
-        logger.info(f"User found with username: {username}")
+        logger.debug("User found with username: %s", username)
     else:
-        logger.warning(f"No user found with username: {username}")
+        logger.warning("No user found with username: %s", username)
     return user
 
-def create_user(db: Session, user_in: UserCreate) -> User:
+def create_user(db: Session, user_in: UserCreate, hashed_password: str | None = None) -> User:
     """
     Create a new user in the database.
 
     Args:
         db (Session): SQLAlchemy database session.
         user_in (UserCreate): User creation data.
+        hashed_password (str | None): Precomputed hash of user_in.password, if
+            the caller already hashed it off the event loop.
 
     Returns:
         User: The newly created user object.
     """
-    logger.info(f"Creating user with username: {user_in.username}")
+    logger.info("Creating user with username: %s", user_in.username)
     try:
-        hashed_password = get_password_hash(user_in.password)
+        if hashed_password is None:
+            hashed_password = get_password_hash(user_in.password)
         db_user = User(
             username=user_in.username,
             email=user_in.email,
@@ -119,43 +93,80 @@ def create_user(db: Session, user_in: UserCreate) -> User:
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
-        logger.info(f"User created successfully with id = {db_user.id}")
+        logger.info("User created successfully with id = %s", db_user.id)
         return db_user
     except Exception as e:
-        logger.error(f"Failed to create user: {e}", exc_info=True)
+        logger.error("Failed to create user: %s", e, exc_info=True)
         db.rollback()
         raise
 
-def update_user(db: Session, user: User, user_in: UserUpdate) -> User:
+def set_password_hash(db: Session, user: User, hashed_password: str) -> User:
+    """
+    Replace a user's stored hash with a rehash of the same password.
+
+    Used after login when the stored hash was made with an outdated bcrypt
+    cost. The password itself is unchanged, so issued tokens stay valid.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        user (User): The user whose hash is replaced.
+        hashed_password (str): The new hash.
+
+    Returns:
+        User: The updated user object.
+    """
+    logger.info("Rehashing password for user id=%s", user.id)
+    try:
+        user.hashed_password = hashed_password
+        db.add(user)
+        db.commit()
+        return user
+    except Exception as e:
+        logger.error("Failed to rehash password for user id=%s: %s", user.id, e, exc_info=True)
+        db.rollback()
+        raise
+
+def update_user(db: Session, user: User, user_in: UserUpdate, hashed_password: str | None = None) -> User:
     """
     Update an existing user's information.
 
+    Changing the email or password bumps ``token_version``, which revokes
+    previously issued access tokens, and drops the user from the auth cache.
+
     Args:
         db (Session): SQLAlchemy database session.
         user (User): The user object to update.
         user_in (UserUpdate): Updated user data.
+        hashed_password (str | None): Precomputed hash of user_in.password, if
+            the caller already hashed it off the event loop.
 
     Returns:
         User: The updated user object.
     """
-    logger.info(f"Updating user id={user.id}")
+    logger.info("Updating user id=%s", user.id)
     try:
         if user_in.username is not None:
-            logger.debug(f"Updating username to: {user_in.username}")
+            logger.debug("Updating username to: %s", user_in.username)
             user.username = user_in.username
-        if user_in.email is not None:
-            logger.debug(f"Updating email to: {user_in.email}")
+        credentials_changed = False
+        if user_in.email is not None and user_in.email != user.email:
+            logger.debug("Updating email to: %s", user_in.email)
             user.email = user_in.email
+            credentials_changed = True
         if user_in.password is not None:
             logger.debug("Updating password")
-            user.hashed_password = get_password_hash(user_in.password)
+            user.hashed_password = hashed_password or get_password_hash(user_in.password)
+            credentials_changed = True
+        if credentials_changed:
+            user.token_version = (user.token_version or 0) + 1
 
         db.add(user)
         db.commit()
         db.refresh(user)
-        logger.info(f"User updated successfully: id={user.id}")
+        auth_cache.invalidate(user.id)
+        logger.info("User updated successfully: id=%s", user.id)
         return user
     except Exception as e:
-        logger.error(f"Failed to update user id={user.id}: {e}", exc_info=True)
+        logger.error("Failed to update user id=%s: %s", user.id, e, exc_info=True)
         db.rollback()
         raise
@@ -1,17 +1,65 @@
+"""
+Database engine and session setup.
+
+The sync engine (psycopg2) is always created; Alembic and the test suite use
+it directly. When ``DB_ASYNC`` is enabled an asyncpg engine is created as
+well and ``get_db`` yields ``AsyncSession`` objects instead, so request
+handlers wait on Postgres without holding a threadpool slot.
+"""
+
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from starlette.concurrency import run_in_threadpool
 from backend.core.config import settings
+from backend.db.pool import engine_options
+from backend.db.instrumentation import install_query_observer
+from backend.metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options())
+instrument_engine(engine)
+if settings.SQL_INSTRUMENTATION:
+    install_query_observer(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(settings.async_database_url, **engine_options(is_async=True))
+    instrument_engine(async_engine.sync_engine)
+    if settings.SQL_INSTRUMENTATION:
+        install_query_observer(async_engine.sync_engine)
+    # Objects are serialized after the handler returns, outside the session's
+    # greenlet, so they must not expire (and lazily reload) on commit.
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+def get_sync_db():
     db: Session = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-print(f"[DB Init] Using DB: {settings.DATABASE_URL}")
\ No newline at end of file
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Request handlers depend on get_db; tests override it with a sync session.
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Run a sync CRUD function ``fn(session, *args, **kwargs)`` from async code.
+
+    With an ``AsyncSession`` the function runs via ``run_sync`` on the event
+    loop (SQLAlchemy's greenlet bridge makes its queries non-blocking). With a
+    plain ``Session`` it is sent to the threadpool, as a ``def`` handler would be.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
+
+print(f"[DB Init] Using DB: {settings.DATABASE_URL}")
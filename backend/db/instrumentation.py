@@ -0,0 +1,172 @@
+"""
+Per-request SQL instrumentation.
+
+When enabled, every statement is tagged with a trailing SQL comment naming
+the route that issued it, statements slower than ``SQL_SLOW_QUERY_MS`` are
+logged with their parameters (and, for a sample of SELECTs, their
+``EXPLAIN`` plan), and each request's statement count is
+checked against ``SQL_QUERY_BUDGET``. In ``raise`` mode exceeding the budget
+aborts the statement, which is how N+1 regressions fail the test suite.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from backend.core.config import settings
+from backend.logger import logger
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a request issues more statements than SQL_QUERY_BUDGET allows.
+    """
+    pass
+
+
+class RequestQueryContext:
+    """
+    Statement bookkeeping for the request currently being served.
+    """
+    __slots__ = ("scope", "count", "warned", "budget_exempt")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.count = 0
+        self.warned = False
+        self.budget_exempt = False
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        template = getattr(route, "path_format", None) or self.scope.get("path", "")
+        return f"{self.scope.get('method', '')} {template}"
+
+
+_request_context: ContextVar[Optional[RequestQueryContext]] = ContextVar("request_query_context", default=None)
+
+
+def current_request_context() -> Optional[RequestQueryContext]:
+    return _request_context.get()
+
+
+class QueryContextMiddleware:
+    """
+    ASGI middleware that opens a RequestQueryContext for each HTTP request.
+
+    The context object is shared (not copied) with threadpool workers and
+    AsyncSession greenlets, so statements run there are counted too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_context.set(RequestQueryContext(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_context.reset(token)
+
+
+def exempt_from_query_budget() -> None:
+    """
+    Opt the current request out of the query budget, for endpoints whose
+    statement count legitimately grows with the data (e.g. batched exports).
+    """
+    ctx = _request_context.get()
+    if ctx is not None:
+        ctx.budget_exempt = True
+
+
+def _check_budget(ctx: RequestQueryContext) -> None:
+    budget = settings.SQL_QUERY_BUDGET
+    if budget <= 0 or ctx.budget_exempt or ctx.count <= budget:
+        return
+    message = f"{ctx.route} exceeded its query budget: {ctx.count} statements (budget {budget})"
+    if settings.SQL_QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    if not ctx.warned:
+        ctx.warned = True
+        logger.warning("%s", message)
+
+
+def _explain(conn, cursor, statement: str, parameters) -> Optional[str]:
+    """
+    Capture the plan of a slow SELECT on the same DBAPI connection. Only
+    psycopg2 on Postgres is supported; other drivers are skipped.
+
+    Plain ``EXPLAIN`` is used rather than ``ANALYZE`` so the statement is not
+    executed a second time (a ``SELECT nextval(...)`` would burn more ids),
+    and it runs under a savepoint so a failure cannot abort the request's
+    transaction.
+    """
+    if conn.dialect.name != "postgresql" or conn.dialect.driver != "psycopg2":
+        return None
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    dbapi_connection = cursor.connection
+    savepoint = not dbapi_connection.autocommit
+    explain_cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            explain_cursor.execute("SAVEPOINT observer_explain")
+        try:
+            explain_cursor.execute(f"EXPLAIN {statement}", parameters)
+            return "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception as e:
+            if savepoint:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT observer_explain")
+            logger.warning("EXPLAIN capture failed: %s", e)
+            return None
+        finally:
+            if savepoint:
+                explain_cursor.execute("RELEASE SAVEPOINT observer_explain")
+    finally:
+        explain_cursor.close()
+
+
+def install_query_observer(engine) -> None:
+    """
+    Attach statement tagging, slow-query logging and budget checks to a sync
+    Engine (for an AsyncEngine pass ``async_engine.sync_engine``).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        ctx = _request_context.get()
+        if ctx is not None:
+            ctx.count += 1
+            _check_budget(ctx)
+            route = ctx.route.replace("*/", "")
+            statement = f"{statement} /* route={route} */"
+        conn.info.setdefault("observer_query_start", []).append(time.perf_counter())
+        return statement, parameters
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("observer_query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if elapsed_ms < settings.SQL_SLOW_QUERY_MS:
+            return
+        ctx = _request_context.get()
+        logger.warning(
+            "Slow query (%.1f ms) from %s: %s | params=%r",
+            elapsed_ms, ctx.route if ctx else "<no request>", statement, parameters,
+        )
+        if not executemany and random.random() < settings.SQL_EXPLAIN_SAMPLE_RATE:
+            plan = _explain(conn, cursor, statement, parameters)
+            if plan:
+                logger.warning("EXPLAIN for slow query:\n%s", plan)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("observer_query_start"):
+            conn.info["observer_query_start"].pop()
@@ -0,0 +1,128 @@
+"""
+Connection pool configuration and statistics.
+
+Builds engine keyword arguments from ``Settings`` and provides pool classes
+that record how long requests wait to check out a connection, so pool
+pressure is visible before it turns into "QueuePool limit reached" errors.
+"""
+
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from backend.core.config import settings
+
+
+class PoolWaitStats:
+    """
+    Running totals of connection checkout waits for one pool.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+        if timed_out:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+class _TimedCheckoutMixin:
+    """
+    Times ``_do_get``, the point where a caller blocks waiting for a free connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.wait_stats = self.wait_stats
+        return new_pool
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(is_async: bool = False) -> dict:
+    """
+    Build pool-related ``create_engine`` keyword arguments from settings.
+
+    ``DB_POOL_MODE=null`` disables client-side pooling (NullPool), which is
+    the right choice behind PgBouncer in transaction mode; the sizing options
+    are ignored in that mode.
+
+    Args:
+        is_async (bool): Whether the options are for an AsyncEngine.
+
+    Returns:
+        dict: Keyword arguments for create_engine/create_async_engine.
+    """
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_POOL_MODE == "null":
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def pool_status(engine) -> dict:
+    """
+    Snapshot of a pool's current occupancy and checkout wait history.
+
+    Args:
+        engine: A sync Engine or AsyncEngine.
+
+    Returns:
+        dict: Pool statistics; occupancy fields are None for NullPool.
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    else:
+        status.update(size=None, checked_out=None, idle=None, overflow=None)
+    wait_stats = getattr(pool, "wait_stats", None)
+    status["wait"] = wait_stats.as_dict() if wait_stats is not None else None
+    return status
@@ -0,0 +1,189 @@
+"""
+Routing of read-only requests to Postgres read replicas.
+
+Replicas are configured with ``DB_REPLICA_URLS``; without any, every read
+uses the primary. Each replica gets its own engine and pool. Read-only
+dependencies (``backend.core.deps.get_read_db``) take replicas in
+round-robin order, skipping any that failed their last health check or lag
+the primary by more than ``DB_REPLICA_MAX_LAG_SECONDS``. Health checks run
+on a background thread every ``DB_REPLICA_HEALTH_INTERVAL_SECONDS``.
+
+For read-your-writes, every commit on a primary session tagged with a user
+id (``get_current_user`` tags the request session) keeps that user's reads
+on the primary for ``DB_READ_YOUR_WRITES_SECONDS``. That window is never
+shorter than the maximum tolerated lag, so once it ends any replica still
+in rotation has replayed the write. Replica sessions are tagged in
+``Session.info`` so callers can avoid caching what they read (see
+``is_replica_session``). The window is tracked
+per worker process, so deployments with several workers should keep it at
+least as long as the replicas' typical lag and route each user to one worker
+where possible.
+"""
+
+import itertools
+import threading
+from typing import List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from backend.core.config import asyncpg_url, settings
+from backend.db.pool import engine_options, pool_status
+from backend.metrics import instrument_engine
+from backend.utils.cache import TTLCache
+from backend.logger import logger
+
+# On a primary pg_is_in_recovery() is false and the lag reads as 0. An idle
+# primary also makes a replica look lagged, which only sends reads back to
+# the primary until the next write is replayed.
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+)
+
+
+class Replica:
+    """
+    One read replica: its engines, session factories and health state.
+    """
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **engine_options())
+        instrument_engine(self.engine)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self.async_session_factory = None
+        if settings.DB_ASYNC:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+            self.async_engine = create_async_engine(asyncpg_url(url), **engine_options(is_async=True))
+            instrument_engine(self.async_engine.sync_engine)
+            self.async_session_factory = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def check(self, max_lag: float) -> bool:
+        """
+        Probe the replica and update ``healthy``.
+        """
+        try:
+            with self.engine.connect() as connection:
+                self.lag_seconds = float(connection.execute(LAG_QUERY).scalar() or 0)
+            self.last_error = None
+            healthy = self.lag_seconds <= max_lag
+        except Exception as e:
+            self.lag_seconds = None
+            self.last_error = str(e)
+            healthy = False
+        if healthy != self.healthy:
+            log = logger.info if healthy else logger.warning
+            log("Replica %s is now %s (lag=%s, error=%s)", self.name, "healthy" if healthy else "unhealthy", self.lag_seconds, self.last_error)
+        self.healthy = healthy
+        return healthy
+
+    def session(self):
+        factory = self.async_session_factory if settings.DB_ASYNC else self.session_factory
+        session = factory()
+        session.info["replica"] = self.name
+        return session
+
+    def status(self) -> dict:
+        return {"healthy": self.healthy, "lag_seconds": self.lag_seconds, "error": self.last_error, "pool": pool_status(self.engine)}
+
+
+class ReplicaRouter:
+    """
+    Picks a healthy replica for a read, or None when the primary should serve it.
+
+    Attributes:
+        replica_reads: Reads routed to a replica.
+        primary_reads: Reads kept on the primary (recent write or no healthy replica).
+    """
+
+    def __init__(self, urls: List[str], max_lag: float, health_interval: float, read_your_writes: Optional[float] = None):
+        if read_your_writes is None:
+            read_your_writes = max_lag
+        if read_your_writes < max_lag:
+            raise ValueError("read_your_writes must be at least max_lag")
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._counter = itertools.count()
+        self._recent_writes = TTLCache(maxsize=100_000, ttl=read_your_writes)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_write(self, user_id: int) -> None:
+        self._recent_writes.set(user_id, True)
+
+    def wrote_recently(self, user_id: Optional[int]) -> bool:
+        return user_id is not None and self._recent_writes.get(user_id) is not None
+
+    def pick(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """
+        Return the next healthy replica in round-robin order, or None if the
+        user wrote within the read-your-writes window or none is healthy.
+        """
+        if self.replicas and not self.wrote_recently(user_id):
+            start = next(self._counter)
+            for offset in range(len(self.replicas)):
+                replica = self.replicas[(start + offset) % len(self.replicas)]
+                if replica.healthy:
+                    self.replica_reads += 1
+                    return replica
+        self.primary_reads += 1
+        return None
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.check_all()
+
+    def start(self) -> None:
+        if self.replicas and self._thread is None:
+            self.check_all()
+            self._thread = threading.Thread(target=self._health_loop, name="replica-health", daemon=True)
+            self._thread.start()
+            logger.info("Replica health checks started for %s replica(s)", len(self.replicas))
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self) -> dict:
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "replicas": {replica.name: replica.status() for replica in self.replicas},
+        }
+
+
+router = ReplicaRouter(
+    settings.replica_urls,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    health_interval=settings.DB_REPLICA_HEALTH_INTERVAL_SECONDS,
+    read_your_writes=settings.read_your_writes_seconds,
+)
+
+
+def is_replica_session(db) -> bool:
+    """
+    Whether ``db`` (a Session or AsyncSession) reads from a replica.
+    """
+    return "replica" in db.info
+
+
+@event.listens_for(Session, "after_commit")
+def _record_user_write(session: Session) -> None:
+    # Sessions are tagged with the authenticated user by get_current_user;
+    # replica sessions never commit, so every tagged commit is a primary write.
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        router.record_write(user_id)
@@ -1,10 +1,19 @@
 """
 Configures the logging system for NoteManager API.
 Logs are rotated daily and saved to a configured directory.
+
+By default records are handed to a bounded in-memory queue and written to
+disk by a background QueueListener thread, so request threads never block on
+file I/O. When the queue is full, records are dropped (and counted) or the
+caller blocks, depending on LOG_OVERFLOW_POLICY. Use %-style arguments
+(``logger.info("id=%s", note_id)``) so disabled levels cost nothing and
+formatting happens on the writer thread.
 """
 
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 import os
@@ -16,6 +25,10 @@ config.read("config.ini")
 
 # Get log directory from config, or fallback to 'logs'
 log_dir = config.get("LOGGING", "LOG_DIR", fallback="logs")
+log_level = config.get("LOGGING", "LOG_LEVEL", fallback="INFO").upper()
+log_async = config.getboolean("LOGGING", "LOG_ASYNC", fallback=True)
+log_queue_size = config.getint("LOGGING", "LOG_QUEUE_SIZE", fallback=10000)
+log_overflow_policy = config.get("LOGGING", "LOG_OVERFLOW_POLICY", fallback="drop").lower()
 
 # Ensure the log directory exists
 Path(log_dir).mkdir(parents=True, exist_ok=True)
@@ -25,7 +38,7 @@ log_file = os.path.join(log_dir, f"api-{datetime.now().strftime('%d-%m-%y')}.log
 
 # Create logger
 logger = logging.getLogger("note_manager_logger")
-logger.setLevel(logging.INFO)
+logger.setLevel(log_level)
 
 # Create a timed rotating file handler (daily logs)
 handler = TimedRotatingFileHandler(
@@ -41,6 +54,54 @@ handler.suffix = "%d-%m-%y"
 formatter = logging.Formatter("[%(asctime)s] %(levelname)s - %(message)s")
 handler.setFormatter(formatter)
 
-# Attach handler to logger
-logger.addHandler(handler)
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that defers formatting to the listener thread and applies an
+    overflow policy when the queue is full.
+
+    The queue never leaves the process, so records are enqueued as-is rather
+    than pre-formatted; message arguments must not be mutated after logging.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block_on_full: bool = False):
+        super().__init__(log_queue)
+        self.block_on_full = block_on_full
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.block_on_full:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+listener = None
+if log_async:
+    log_queue = queue.Queue(maxsize=log_queue_size)
+    queue_handler = BoundedQueueHandler(log_queue, block_on_full=log_overflow_policy == "block")
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    # Attach the queue handler to logger; the file handler runs on the listener thread
+    logger.addHandler(queue_handler)
+else:
+    # Attach handler to logger
+    logger.addHandler(handler)
 logger.propagate = False
+
+
+def dropped_records() -> int:
+    """
+    Number of log records discarded because the queue was full.
+    """
+    for h in logger.handlers:
+        if isinstance(h, BoundedQueueHandler):
+            return h.dropped
+    return 0
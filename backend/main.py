@@ -10,12 +10,21 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from backend.api.route_user import router as user_router
 from backend.api.route_note import router as note_router
+from backend.api.route_tag import router as tag_router
 from backend.api.route_auth import router as auth_router 
-from backend.logger import logger
+from backend.api.route_health import router as health_router
+from backend.core.security import PasswordHasherBusy, password_hasher
+from backend.core import note_cache, note_events
+from backend.core.config import settings
+from backend.db import database, replicas
+from backend.db.pool import pool_status
+from backend.db.instrumentation import QueryContextMiddleware
+from backend import metrics
+from backend.logger import logger, dropped_records
 
 
 EXTERNAL_URL = "https://webhook.site/feae50a3-1af1-4a91-bc80-724b53915f1d"
@@ -27,12 +36,19 @@ async def lifespan(app: FastAPI):
     # Optional: remove the browser-launch thread too
     def open_external_url():
         time.sleep(1.5)
-        logger.info(f"Opening external URL: {EXTERNAL_URL}")
+        logger.info("Opening external URL: %s", EXTERNAL_URL)
         webbrowser.open(EXTERNAL_URL)
 
     threading.Thread(target=open_external_url, daemon=True).start()
 
+    replicas.router.start()
+    if settings.NOTE_EVENTS_PG_NOTIFY:
+        note_events.start_bridge(database.engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+
     yield
+    note_events.stop_bridge()
+    replicas.router.stop()
+    password_hasher.shutdown()
     logger.info("NoteManager API is shutting down...")
 
 app = FastAPI(
@@ -42,14 +58,61 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(QueryContextMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    logger.warning("Rejected %s %s: password hashing queue full", request.method, request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 @app.get("/")
 def read_root():
     logger.info("Root endpoint '/' was accessed.")
     return JSONResponse(content={"msg": "Welcome to the NoteManager API."})
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    engines = [("primary", database.engine)]
+    if database.async_engine is not None:
+        engines.append(("primary_async", database.async_engine))
+    engines.extend((replica.name, replica.engine) for replica in replicas.router.replicas)
+    pool_gauges = {"checked_out": [], "idle": [], "overflow": []}
+    for name, engine in engines:
+        status = pool_status(engine)
+        for field, samples in pool_gauges.items():
+            if status[field] is not None:
+                samples.append(({"engine": name}, status[field]))
+
+    cache_stats = note_cache.stats() or {}
+    cache_samples = {
+        counter: [({"backend": cache_stats["backend"]}, cache_stats[counter])] if cache_stats.get(counter) is not None else []
+        for counter in ("hits", "misses", "evictions")
+    }
+
+    body = metrics.render(extra_gauges=[
+        ("db_pool_checked_out_connections", "Connections currently checked out of the pool.", pool_gauges["checked_out"]),
+        ("db_pool_idle_connections", "Idle connections held by the pool.", pool_gauges["idle"]),
+        ("db_pool_overflow_connections", "Connections open beyond pool_size.", pool_gauges["overflow"]),
+        ("log_records_dropped", "Log records dropped because the log queue was full.", [({}, dropped_records())]),
+        ("note_cache_hits", "Note cache lookups that returned an entry.", cache_samples["hits"]),
+        ("note_cache_misses", "Note cache lookups that found nothing.", cache_samples["misses"]),
+        ("note_cache_evictions", "Note cache entries evicted to stay within the size bound.", cache_samples["evictions"]),
+    ])
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 # Register routers
 app.include_router(user_router)
 app.include_router(note_router)
+app.include_router(tag_router)
 app.include_router(auth_router)
+app.include_router(health_router)
 
 logger.info("Routes registered. App Ready.")
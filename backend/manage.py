@@ -0,0 +1,39 @@
+"""
+Maintenance commands for the NoteManager database.
+
+Usage:
+    python -m backend.manage rebuild-tag-counts [--owner-id ID]
+"""
+
+import argparse
+from dotenv import load_dotenv
+# Load environment variables
+load_dotenv()
+
+from backend.db.database import SessionLocal
+from backend.crud import tag as tag_crud
+
+
+def rebuild_tag_counts(args: argparse.Namespace) -> None:
+    """
+    Recompute the tag_usage table from notes and their tags.
+    """
+    with SessionLocal() as db:
+        written = tag_crud.rebuild_tag_counts(db, owner_id=args.owner_id)
+    print(f"Rebuilt {written} tag usage rows")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.manage", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-tag-counts", help="Recompute per-user tag note counts.")
+    rebuild.add_argument("--owner-id", type=int, default=None, help="Only rebuild this user's counts.")
+    rebuild.set_defaults(func=rebuild_tag_counts)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
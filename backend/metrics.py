@@ -0,0 +1,205 @@
+"""
+In-process metrics for the NoteManager API, exposed in Prometheus text format.
+
+Collects per-route request latency histograms, status code counters and an
+in-flight gauge via an ASGI middleware, and SQL statement counts/durations
+via SQLAlchemy cursor events. Buckets are fixed up front and updates are
+plain integer/float increments without locks: under free-threaded contention
+an occasional increment may be lost, which is an accepted trade-off for a
+hot path that runs on every request and statement.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; ``counts[i]`` holds observations in bucket i only,
+    cumulative counts are computed at exposition time.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    Holds all collected metrics for this process.
+    """
+
+    def __init__(self):
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_status: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight = 0
+        self.sql_latency: Dict[str, Histogram] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        histogram = self.request_latency.get(key)
+        if histogram is None:
+            histogram = self.request_latency.setdefault(key, Histogram(LATENCY_BUCKETS))
+        histogram.observe(seconds)
+        status_key = (method, route, status)
+        self.request_status[status_key] = self.request_status.get(status_key, 0) + 1
+
+    def observe_sql(self, operation: str, seconds: float) -> None:
+        histogram = self.sql_latency.get(operation)
+        if histogram is None:
+            histogram = self.sql_latency.setdefault(operation, Histogram(SQL_BUCKETS))
+        histogram.observe(seconds)
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+registry = Registry()
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_le(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _render_histogram(lines: list, name: str, histogram: Histogram, **labels) -> None:
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=_format_le(bound))} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+
+def render(extra_gauges: Iterable[Tuple[str, str, List[Tuple[dict, float]]]] = ()) -> str:
+    """
+    Render all metrics in Prometheus text exposition format (version 0.0.4).
+
+    Args:
+        extra_gauges: ``(name, help, [(labels, value), ...])`` gauges sampled
+            at scrape time, e.g. pool occupancy.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = [
+        "# HELP http_request_duration_seconds HTTP request latency by route template.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route), histogram in list(registry.request_latency.items()):
+        _render_histogram(lines, "http_request_duration_seconds", histogram, method=method, route=route)
+
+    lines += [
+        "# HELP http_requests_total HTTP responses by route template and status code.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status), count in list(registry.request_status.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += [
+        "# HELP http_requests_in_flight HTTP requests currently being served.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {registry.in_flight}",
+        "# HELP db_statement_duration_seconds SQL statement execution time by operation.",
+        "# TYPE db_statement_duration_seconds histogram",
+    ]
+    for operation, histogram in list(registry.sql_latency.items()):
+        _render_histogram(lines, "db_statement_duration_seconds", histogram, operation=operation)
+
+    lines += [
+        "# HELP db_statements_total SQL statements executed by operation.",
+        "# TYPE db_statements_total counter",
+    ]
+    for operation, histogram in list(registry.sql_latency.items()):
+        lines.append(f"db_statements_total{_labels(operation=operation)} {histogram.count}")
+
+    for name, help_text, samples in extra_gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight count per request.
+
+    The route label is the matched path template (e.g. ``/notes/{note_id}``)
+    so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or getattr(route, "path", None) or "<unmatched>"
+            registry.observe_request(scope["method"], template, status_holder[0], time.perf_counter() - start)
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def instrument_engine(engine) -> None:
+    """
+    Record statement counts and durations for a sync Engine (for an
+    AsyncEngine pass ``async_engine.sync_engine``).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            registry.observe_sql(_operation(statement), time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
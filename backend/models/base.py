@@ -3,7 +3,19 @@ Defines the base class for all SQLAlchemy ORM models.
 Used to create database tables via declarative mapping.
 """
 
+from datetime import datetime, timezone
 from sqlalchemy.orm import declarative_base
 
 # Base class for all ORM models
 Base = declarative_base()
+
+
+def utcnow() -> datetime:
+    """
+    Current UTC time; used as a column default so it is evaluated per row
+    rather than once at import.
+
+    Naive, to match the ``TIMESTAMP WITHOUT TIME ZONE`` columns: psycopg2
+    drops the offset silently, but asyncpg rejects aware values outright.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
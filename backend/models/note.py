@@ -3,20 +3,33 @@ Defines the Note and Tag ORM models and their many-to-many relationship.
 
 Note: Represents a user-created note with tags.
 Tag: Represents a label that can be attached to multiple notes.
+TagUsage: Per-user note count for each tag, maintained by the note CRUD.
+NoteTombstone: Record of a deleted note, served by the change feed.
 """
 
-from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, ForeignKey, Table, Index, Sequence, cast, func
 from sqlalchemy.orm import relationship
-from backend.models.base import Base
+from backend.models.base import Base, utcnow
 
 
+# Shared by notes and tombstones: every insert, update or delete of a note
+# draws the next value, so one counter orders all changes for the feed.
+note_change_seq = Sequence("note_change_seq", metadata=Base.metadata)
+
+# ID of the writing transaction. The change feed orders by (change_xid,
+# change_seq) and only serves transactions older than every one still
+# running, so a late commit can never land behind a cursor already handed out.
+current_xact_id = cast(cast(func.pg_current_xact_id(), Text), BigInteger)
+
 # Association table for many-to-many relationship between notes and tags
 note_tag_association = Table(
     "note_tag_association",
     Base.metadata,
     Column("note_id", Integer, ForeignKey("notes.id"), primary_key=True),
-    Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True)
+    Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+    # The primary key only serves note -> tags; this serves tag -> notes
+    # (tag-filtered listing) as an index-only scan.
+    Index("ix_note_tag_association_tag_id_note_id", "tag_id", "note_id"),
 )
 
 class Note(Base):
@@ -29,21 +42,51 @@ class Note(Base):
         content: Full content/text of the note.
         created_at: Timestamp of creation.
         updated_at: Timestamp of last update.
+        version: Incremented on every update; backs ETags and optimistic locking.
+        change_seq: Position of the note's latest write in the change feed.
+        change_xid: Transaction of the note's latest write (see ``current_xact_id``).
         owner_id: Foreign key linking to the note's creator (User).
         owner: Relationship to the User model.
         tags: Many-to-many relationship with Tag model.
+
+    On Postgres the table also has a generated ``search_vector`` tsvector
+    column (see the b3f81d6c2e47 migration). It is not mapped here so that
+    other engines can still create the table; search queries reference it
+    directly. The migrations also give ``created_at``/``updated_at`` a
+    database-side ``now()`` default, ``change_seq`` a ``nextval`` default and
+    ``change_xid`` a ``pg_current_xact_id()`` default for rows written
+    outside the ORM (e.g. COPY).
     """
     __tablename__ = "notes"
+    __table_args__ = (
+        # Serves owner-scoped keyset pagination: WHERE owner_id = ? AND id > ? ORDER BY id
+        Index("ix_notes_owner_id_id", "owner_id", "id"),
+        # Serves the change feed: WHERE owner_id = ? AND (change_xid, change_seq) > (?, ?)
+        # ORDER BY change_xid, change_seq
+        Index("ix_notes_owner_id_change_xid_change_seq", "owner_id", "change_xid", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False)
     content = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    change_seq = Column(BigInteger, note_change_seq, nullable=False, onupdate=note_change_seq.next_value())
+    change_xid = Column(BigInteger, nullable=False, default=current_xact_id, onupdate=current_xact_id)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="notes")
 
-    tags = relationship("Tag", secondary=note_tag_association, back_populates="notes")
+    # Tags are always serialized with the note, so load them for a whole
+    # result set in one extra SELECT ... WHERE note_id IN (...) instead of
+    # lazily per note. Ordered so a note's representation (and ETag) is stable.
+    tags = relationship(
+        "Tag", secondary=note_tag_association, back_populates="notes", lazy="selectin", order_by="Tag.id"
+    )
+
+    # UPDATEs include "WHERE version = <loaded version>" and bump it, so a
+    # concurrent write raises StaleDataError instead of being overwritten.
+    __mapper_args__ = {"version_id_col": version}
 
 
 class Tag(Base):
@@ -60,3 +103,49 @@ class Tag(Base):
     name = Column(String(50), unique=True, nullable=False)
 
     notes = relationship("Note", secondary=note_tag_association, back_populates="tags")
+
+
+class TagUsage(Base):
+    """
+    SQLAlchemy model holding how many of a user's notes carry a tag.
+
+    Rows are adjusted in the same transaction as every note write (see
+    ``backend.crud.tag.adjust_tag_counts``) so the tag cloud never has to
+    count associations at read time. ``rebuild_tag_counts`` recomputes them
+    if they ever drift.
+
+    Attributes:
+        owner_id: The user whose notes are counted.
+        tag_id: The counted tag.
+        note_count: Number of the user's notes carrying the tag.
+    """
+    __tablename__ = "tag_usage"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    note_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    tag = relationship("Tag", lazy="joined")
+
+
+class NoteTombstone(Base):
+    """
+    SQLAlchemy model recording a deleted note for the change feed.
+
+    Attributes:
+        note_id: ID the deleted note had.
+        owner_id: The user who owned it.
+        change_seq: Position of the deletion in the change feed.
+        change_xid: Transaction that deleted the note.
+        deleted_at: Timestamp of deletion.
+    """
+    __tablename__ = "note_tombstones"
+    __table_args__ = (
+        Index("ix_note_tombstones_owner_id_change_xid_change_seq", "owner_id", "change_xid", "change_seq"),
+    )
+
+    note_id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    change_seq = Column(BigInteger, note_change_seq, nullable=False)
+    change_xid = Column(BigInteger, nullable=False, default=current_xact_id)
+    deleted_at = Column(DateTime, default=utcnow)
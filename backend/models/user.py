@@ -3,10 +3,9 @@ Defines the User ORM model for managing user accounts.
 Each user can own multiple notes.
 """
 
-from datetime import datetime, timezone
 from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
-from backend.models.base import Base  
+from backend.models.base import Base, utcnow
 from backend.models.note import Note  
 
 class User(Base):
@@ -19,6 +18,7 @@ class User(Base):
         email: Unique email address.
         hashed_password: Encrypted password.
         created_at: Timestamp of account creation.
+        token_version: Bumped on credential changes to revoke issued tokens.
         notes: One-to-many relationship to Note model.
     """
     __tablename__ = "users"
@@ -27,6 +27,7 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     hashed_password = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     notes = relationship("Note", back_populates="owner")
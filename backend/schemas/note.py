@@ -4,8 +4,8 @@ Pydantic schemas for note and tag operations.
 Defines serialization for creating, updating, and retrieving notes and their tags.
 """
 
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from datetime import datetime, timezone
 
 
@@ -14,7 +14,7 @@ class TagBase(BaseModel):
     """
     Base schema for a tag (shared attributes).
     """
-    name: str # Name of the tag
+    name: str = Field(..., max_length=50) # Name of the tag, matches tags.name
 
 class TagCreate(TagBase):
     """
@@ -28,15 +28,20 @@ class Tag(TagBase):
     """
     id: int
 
-    class Config:
-        orm_mode = True # Enables ORM compatibility
+    model_config = ConfigDict(from_attributes=True) # Enables ORM compatibility
+
+class TagWithCount(Tag):
+    """
+    Schema for a tag in a user's tag list, optionally with its usage count.
+    """
+    note_count: Optional[int] = None # Number of the user's notes carrying the tag
 
 
 class NoteBase(BaseModel):
     """
     Base schema for a note (shared attributes).
     """
-    title: str
+    title: str = Field(..., max_length=100) # Matches notes.title
     content: Optional[str] = None # Optional note content
 
 class NoteCreate(NoteBase):
@@ -52,6 +57,25 @@ class NoteUpdate(NoteBase):
     """
     tags: Optional[List[TagCreate]] = []
 
+class NotePatch(BaseModel):
+    """
+    Schema for a partial note update.
+    Only fields present in the request are written. ``tags`` replaces the
+    tag set; ``add_tags`` / ``remove_tags`` change it incrementally.
+    """
+    title: Optional[str] = Field(None, max_length=100)
+    content: Optional[str] = None
+    tags: Optional[List[TagCreate]] = None
+    add_tags: List[TagCreate] = []
+    remove_tags: List[str] = [] # Tag names to detach
+
+    @field_validator("title")
+    @classmethod
+    def title_not_null(cls, value: Optional[str]) -> str:
+        if value is None:
+            raise ValueError("title cannot be null")
+        return value
+
 class NoteInDBBase(NoteBase):
     """
     Base schema for a note retrieved from the database.
@@ -62,8 +86,7 @@ class NoteInDBBase(NoteBase):
     updated_at: datetime
     tags: List[Tag] = [] # List of associated Tags
 
-    class Config:
-        orm_mode = True # Enables ORM compatibility
+    model_config = ConfigDict(from_attributes=True) # Enables ORM compatibility
 
 class Note(NoteInDBBase):
     """
@@ -73,3 +96,76 @@ class Note(NoteInDBBase):
     pass
 
 
+class NoteBulkCreate(BaseModel):
+    """
+    Schema for creating many notes in one request.
+    Items are validated individually so one bad item does not reject the batch.
+    """
+    notes: List[Dict[str, Any]]
+
+class NoteBulkError(BaseModel):
+    """
+    A single rejected item from a bulk request.
+    """
+    index: int # Position of the item in the request
+    detail: str
+
+class NoteBulkResult(BaseModel):
+    """
+    Schema returned from bulk note creation.
+    """
+    created_ids: List[int] = [] # IDs of created notes, in request order
+    errors: List[NoteBulkError] = []
+
+class NoteImportResult(BaseModel):
+    """
+    Schema returned from a streamed NDJSON import.
+    """
+    imported: int = 0 # Notes committed
+    batches: int = 0 # Batches committed
+    lines: int = 0 # Lines read, including blank and rejected ones
+    errors: List[NoteBulkError] = [] # Rejected lines; ``index`` is the 1-based line number
+    errors_truncated: bool = False # True when more errors occurred than are listed
+
+class NoteBatchDelete(BaseModel):
+    """
+    Schema for deleting many notes at once.
+    Criteria are combined with AND; at least one is required.
+    """
+    ids: Optional[List[int]] = None # Only these note IDs
+    tag: Optional[str] = None # Only notes carrying this tag name
+    created_before: Optional[datetime] = None # Only notes created before this time
+
+    @model_validator(mode="after")
+    def require_criteria(self) -> "NoteBatchDelete":
+        if self.ids is None and self.tag is None and self.created_before is None:
+            raise ValueError("Provide ids, tag or created_before")
+        return self
+
+class NoteBatchDeleteResult(BaseModel):
+    """
+    Schema returned from a batch delete.
+    """
+    deleted: int = 0 # Notes deleted
+
+class NoteBatchGet(BaseModel):
+    """
+    Schema for fetching many notes by ID in one request.
+    """
+    ids: List[int]
+
+class NoteBatchGetResult(BaseModel):
+    """
+    Schema returned from a batch read.
+    """
+    notes: List[Note] = [] # Owned notes, in request order
+    missing: List[int] = [] # Requested IDs that do not exist or are not owned
+
+class NoteChanges(BaseModel):
+    """
+    Schema returned from the note change feed.
+    """
+    notes: List[Note] = [] # Notes created or updated since the cursor
+    deleted: List[int] = [] # IDs of notes deleted since the cursor
+    cursor: str # Pass as ``since`` to fetch the next changes
+    has_more: bool = False # True when more changes are waiting
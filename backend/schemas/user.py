@@ -4,7 +4,7 @@ Pydantic schemas for user-related operations.
 Includes schemas for user creation, update, reading from the DB, and API responses.
 """
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from datetime import datetime
 from typing import Optional
 
@@ -42,8 +42,7 @@ class UserInDBBase(UserBase):
     id: int
     created_at: datetime
 
-    class Config:
-        orm_mode = True # Enables ORM compatibility
+    model_config = ConfigDict(from_attributes=True) # Enables ORM compatibility
 
 
 class User(UserInDBBase):
@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 load_dotenv(".env.test", override=True)
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
 from alembic.config import Config
@@ -13,6 +13,8 @@ from alembic import command
 from backend.db.database import get_db
 from backend.main import app
 from backend.core.config import settings
+from backend.core import auth_cache, note_cache
+from backend.db.instrumentation import install_query_observer
 
 # Fail fast if not using test DB
 if "test" not in settings.DATABASE_URL:
@@ -21,6 +23,8 @@ if "test" not in settings.DATABASE_URL:
 # Setup SQLAlchemy engine for the test database
 engine = create_engine(settings.DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if settings.SQL_INSTRUMENTATION:
+    install_query_observer(engine)
 
 def run_alembic_migrations():
     alembic_cfg = Config(os.path.join(os.path.dirname(__file__), "../../alembic.ini"))
@@ -46,11 +50,16 @@ def db_session():
 @pytest.fixture(autouse=True)
 def clear_tables(db_session):
     # Clear data between tests
+    db_session.execute(text("TRUNCATE TABLE tag_usage RESTART IDENTITY CASCADE"))
+    db_session.execute(text("TRUNCATE TABLE note_tombstones RESTART IDENTITY CASCADE"))
     db_session.execute(text("TRUNCATE TABLE note_tag_association RESTART IDENTITY CASCADE"))
     db_session.execute(text("TRUNCATE TABLE notes RESTART IDENTITY CASCADE"))
     db_session.execute(text("TRUNCATE TABLE tags RESTART IDENTITY CASCADE"))
     db_session.execute(text("TRUNCATE TABLE users RESTART IDENTITY CASCADE"))
     db_session.commit()
+    # User ids restart with the tables, so cached principals would be stale
+    auth_cache.clear()
+    note_cache.clear()
 
 @pytest.fixture
 def client(db_session):
@@ -64,6 +73,22 @@ def client(db_session):
     with TestClient(app) as c:
         yield c
 
+@pytest.fixture
+def query_counter():
+    """
+    Records every SQL statement executed on the test engine while active.
+    """
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
 @pytest.fixture
 def auth_header(client):
     user_res = client.post("/users/", json={
@@ -80,3 +105,29 @@ def auth_header(client):
     assert login_res.status_code == 200
     token = login_res.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def user_id(auth_header):
+    from backend.core.security import decode_access_token
+    return decode_access_token(auth_header["Authorization"].split(" ", 1)[1])["uid"]
+
+@pytest.fixture
+def async_client(client, monkeypatch):
+    """
+    The test client with DB_ASYNC enabled: routes get an asyncpg-backed
+    AsyncSession and CRUD runs through ``run_sync``.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    # NullPool: asyncpg connections must not outlive the client's event loop
+    async_engine = create_async_engine(settings.async_database_url, poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def _override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    monkeypatch.setitem(app.dependency_overrides, get_db, _override_get_db)
+    yield client
@@ -0,0 +1,72 @@
+import pytest
+
+def test_db_pool_stats(client):
+    response = client.get("/health/db-pool")
+    assert response.status_code == 200
+    primary = response.json()["primary"]
+    assert primary["pool_class"] == "TimedQueuePool"
+    assert primary["checked_out"] >= 0
+    assert primary["idle"] >= 0
+    assert set(primary["wait"]) == {"checkouts", "timeouts", "wait_seconds_total", "wait_seconds_max"}
+
+def test_metrics_endpoint_reports_route_templates(client, auth_header):
+    res = client.post("/notes/", json={"title": "Metered"}, headers=auth_header)
+    client.get(f"/notes/{res.json()['id']}", headers=auth_header)
+    client.get("/notes/999999", headers=auth_header)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/notes/{note_id}",le="+Inf"}' in body
+    assert 'http_requests_total{method="GET",route="/notes/{note_id}",status="404"}' in body
+    assert "http_requests_in_flight" in body
+
+def test_engine_instrumentation_counts_statements():
+    from sqlalchemy import create_engine, text
+    from backend import metrics
+    from backend.core.config import settings
+
+    engine = create_engine(settings.DATABASE_URL)
+    metrics.instrument_engine(engine)
+    before = metrics.registry.sql_latency.get("SELECT")
+    before_count = before.count if before else 0
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert metrics.registry.sql_latency["SELECT"].count == before_count + 1
+    engine.dispose()
+
+def test_query_budget_fails_requests_over_budget(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    from backend.db.instrumentation import QueryBudgetExceeded
+    client.post("/notes/", json={"title": "Budgeted"}, headers=auth_header)
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", 1)
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET_MODE", "raise")
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/notes/", headers=auth_header)
+
+def test_statements_are_tagged_with_route(client, auth_header, query_counter):
+    client.get("/notes/", headers=auth_header)
+    assert any(s.rstrip().endswith("/* route=GET /notes/ */") for s in query_counter)
+
+def test_slow_query_explain_does_not_rerun_or_abort(monkeypatch):
+    from sqlalchemy import create_engine, text
+    from backend.core.config import settings
+    from backend.db import instrumentation
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "SQL_EXPLAIN_SAMPLE_RATE", 1.0)
+    engine = create_engine(settings.DATABASE_URL)
+    instrumentation.install_query_observer(engine)
+    try:
+        with engine.connect() as conn:
+            # The plan is captured without executing the statement again
+            first = conn.execute(text("SELECT nextval('note_change_seq')")).scalar()
+            assert conn.execute(text("SELECT nextval('note_change_seq')")).scalar() == first + 1
+
+            # A failed EXPLAIN leaves the surrounding transaction usable
+            cursor = conn.connection.cursor()
+            assert instrumentation._explain(conn, cursor, "SELECT * FROM missing_table", None) is None
+            cursor.close()
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+    finally:
+        engine.dispose()
@@ -0,0 +1,21 @@
+import logging
+import queue
+
+from backend.logger import BoundedQueueHandler
+
+def _record(msg, *args):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+def test_queue_handler_drops_when_full():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1))
+    handler.emit(_record("first"))
+    handler.emit(_record("second"))
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+def test_queue_handler_defers_formatting():
+    handler = BoundedQueueHandler(queue.Queue())
+    handler.emit(_record("note id=%s", 42))
+    record = handler.queue.get_nowait()
+    assert record.msg == "note id=%s"
+    assert record.getMessage() == "note id=42"
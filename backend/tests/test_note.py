@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 
 def test_create_note(client, auth_header):
@@ -31,3 +32,611 @@ def test_delete_note(client, auth_header):
     assert response.status_code == 204
     get_res = client.get(f"/notes/{note_id}", headers=auth_header)
     assert get_res.status_code == 404
+
+def test_read_notes_cursor_pagination(client, auth_header):
+    for i in range(5):
+        client.post("/notes/", json={"title": f"Note {i}", "content": "c"}, headers=auth_header)
+
+    first = client.get("/notes/?limit=2", headers=auth_header)
+    assert first.status_code == 200
+    assert [n["title"] for n in first.json()] == ["Note 0", "Note 1"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/notes/?limit=2&cursor={cursor}", headers=auth_header)
+    assert [n["title"] for n in second.json()] == ["Note 2", "Note 3"]
+
+    last = client.get(f"/notes/?limit=2&cursor={second.headers['X-Next-Cursor']}", headers=auth_header)
+    assert [n["title"] for n in last.json()] == ["Note 4"]
+    assert "X-Next-Cursor" not in last.headers
+
+def test_read_notes_invalid_cursor(client, auth_header):
+    response = client.get("/notes/?cursor=not-a-cursor", headers=auth_header)
+    assert response.status_code == 400
+
+def test_read_notes_query_count_is_constant(client, auth_header, query_counter):
+    client.post("/notes/", json={"title": "One", "tags": [{"name": "a"}]}, headers=auth_header)
+    query_counter.clear()
+    client.get("/notes/", headers=auth_header)
+    single_note_queries = len(query_counter)
+
+    for i in range(5):
+        client.post("/notes/", json={"title": f"More {i}", "tags": [{"name": f"t{i}"}, {"name": "a"}]}, headers=auth_header)
+    query_counter.clear()
+    response = client.get("/notes/", headers=auth_header)
+    assert len(response.json()) == 6
+    assert all(note["tags"] for note in response.json())
+    assert len(query_counter) == single_note_queries
+
+def test_create_note_resolves_tags_in_bulk(client, auth_header, query_counter):
+    client.post("/notes/", json={"title": "Seed", "tags": [{"name": "existing"}]}, headers=auth_header)
+    query_counter.clear()
+    tags = [{"name": "existing"}] + [{"name": f"new{i}"} for i in range(10)] + [{"name": "new0"}]
+    response = client.post("/notes/", json={"title": "Tagged", "tags": tags}, headers=auth_header)
+    assert response.status_code == 201
+    names = [tag["name"] for tag in response.json()["tags"]]
+    assert sorted(names) == sorted(["existing"] + [f"new{i}" for i in range(10)])
+    tag_inserts = [s for s in query_counter if s.lstrip().upper().startswith("INSERT INTO TAGS")]
+    assert len(tag_inserts) == 1
+
+def test_update_note_reuses_existing_tags(client, auth_header):
+    res = client.post("/notes/", json={"title": "A", "tags": [{"name": "x"}]}, headers=auth_header)
+    note_id = res.json()["id"]
+    tag_id = res.json()["tags"][0]["id"]
+    response = client.put(f"/notes/{note_id}", json={"title": "B", "tags": [{"name": "x"}, {"name": "y"}]}, headers=auth_header)
+    assert response.status_code == 200
+    tags = {tag["name"]: tag["id"] for tag in response.json()["tags"]}
+    assert tags["x"] == tag_id
+    assert set(tags) == {"x", "y"}
+
+def test_create_notes_bulk(client, auth_header):
+    notes = [{"title": f"Bulk {i}", "tags": [{"name": "bulk"}, {"name": f"b{i % 3}"}]} for i in range(50)]
+    notes.insert(10, {"content": "missing title"})
+    response = client.post("/notes/bulk", json={"notes": notes}, headers=auth_header)
+    assert response.status_code == 201
+    data = response.json()
+    assert len(data["created_ids"]) == 50
+    assert [e["index"] for e in data["errors"]] == [10]
+
+    listed = client.get("/notes/?limit=100", headers=auth_header).json()
+    assert len(listed) == 50
+    assert all("bulk" in {t["name"] for t in note["tags"]} for note in listed)
+
+def test_create_notes_bulk_rejects_oversized_batch(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_BULK_MAX_ITEMS", 2)
+    response = client.post("/notes/bulk", json={"notes": [{"title": str(i)} for i in range(3)]}, headers=auth_header)
+    assert response.status_code == 413
+
+def test_search_notes(client, auth_header):
+    client.post("/notes/", json={"title": "Grocery list", "content": "apples and bananas"}, headers=auth_header)
+    client.post("/notes/", json={"title": "Bananas", "content": "bread recipe"}, headers=auth_header)
+    client.post("/notes/", json={"title": "Meeting", "content": "quarterly planning"}, headers=auth_header)
+
+    response = client.get("/notes/search?q=bananas", headers=auth_header)
+    assert response.status_code == 200
+    titles = [note["title"] for note in response.json()]
+    assert titles == ["Bananas", "Grocery list"]
+
+    assert client.get("/notes/search?q=nothing-matches", headers=auth_header).json() == []
+
+def test_search_notes_scoped_to_owner(client, auth_header):
+    client.post("/notes/", json={"title": "Secret plans"}, headers=auth_header)
+    client.post("/users/", json={"username": "other", "email": "other@example.com", "password": "securepass"})
+    token = client.post("/login", data={"username": "other@example.com", "password": "securepass"}).json()["access_token"]
+    response = client.get("/notes/search?q=secret", headers={"Authorization": f"Bearer {token}"})
+    assert response.json() == []
+
+def test_read_note_conditional_get(client, auth_header):
+    note_id = client.post("/notes/", json={"title": "Cached"}, headers=auth_header).json()["id"]
+    first = client.get(f"/notes/{note_id}", headers=auth_header)
+    etag = first.headers["ETag"]
+    assert "Last-Modified" in first.headers
+
+    cached = client.get(f"/notes/{note_id}", headers={**auth_header, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    client.put(f"/notes/{note_id}", json={"title": "Changed"}, headers=auth_header)
+    changed = client.get(f"/notes/{note_id}", headers={**auth_header, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+def test_read_notes_conditional_get(client, auth_header):
+    client.post("/notes/", json={"title": "Listed"}, headers=auth_header)
+    etag = client.get("/notes/", headers=auth_header).headers["ETag"]
+    assert client.get("/notes/", headers={**auth_header, "If-None-Match": etag}).status_code == 304
+    client.post("/notes/", json={"title": "Another"}, headers=auth_header)
+    assert client.get("/notes/", headers={**auth_header, "If-None-Match": etag}).status_code == 200
+
+def test_read_notes_ignores_if_modified_since(client, auth_header):
+    keep = client.post("/notes/", json={"title": "Keep"}, headers=auth_header).json()
+    gone = client.post("/notes/", json={"title": "Gone"}, headers=auth_header).json()
+    listed = client.get("/notes/", headers=auth_header)
+    assert "Last-Modified" not in listed.headers
+    # Deleting a note does not advance any timestamp left on the page
+    client.delete(f"/notes/{gone['id']}", headers=auth_header)
+    since = client.get(f"/notes/{keep['id']}", headers=auth_header).headers["Last-Modified"]
+    response = client.get("/notes/", headers={**auth_header, "If-Modified-Since": since})
+    assert response.status_code == 200
+    assert [n["title"] for n in response.json()] == ["Keep"]
+
+def test_update_note_if_match(client, auth_header):
+    res = client.post("/notes/", json={"title": "Versioned", "tags": [{"name": "v"}]}, headers=auth_header)
+    note_id = res.json()["id"]
+    etag = client.get(f"/notes/{note_id}", headers=auth_header).headers["ETag"]
+
+    ok = client.put(f"/notes/{note_id}", json={"title": "V2", "tags": [{"name": "v"}]}, headers={**auth_header, "If-Match": etag})
+    assert ok.status_code == 200
+    assert ok.headers["ETag"] != etag
+
+    stale = client.put(f"/notes/{note_id}", json={"title": "V3"}, headers={**auth_header, "If-Match": etag})
+    assert stale.status_code == 412
+
+def test_updated_at_advances_on_update(client, auth_header):
+    created = client.post("/notes/", json={"title": "Timestamps"}, headers=auth_header).json()
+    updated = client.put(f"/notes/{created['id']}", json={"title": "Timestamps 2"}, headers=auth_header).json()
+    assert updated["updated_at"] > created["updated_at"]
+
+def test_read_note_served_from_cache_and_invalidated(client, auth_header, query_counter):
+    note_id = client.post("/notes/", json={"title": "Hot"}, headers=auth_header).json()["id"]
+    client.get(f"/notes/{note_id}", headers=auth_header)
+
+    query_counter.clear()
+    cached = client.get(f"/notes/{note_id}", headers=auth_header)
+    assert cached.json()["title"] == "Hot"
+    assert not any("FROM notes" in s for s in query_counter)
+
+    client.put(f"/notes/{note_id}", json={"title": "Hotter"}, headers=auth_header)
+    assert client.get(f"/notes/{note_id}", headers=auth_header).json()["title"] == "Hotter"
+
+    client.delete(f"/notes/{note_id}", headers=auth_header)
+    assert client.get(f"/notes/{note_id}", headers=auth_header).status_code == 404
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+def test_note_cache_redis_backend(client, auth_header, user_id):
+    from backend.core import note_cache
+    fake = FakeRedis()
+    previous = note_cache.backend
+    note_cache.set_backend(note_cache.RedisBackend(fake, ttl=60))
+    try:
+        note_id = client.post("/notes/", json={"title": "Shared"}, headers=auth_header).json()["id"]
+        first = client.get(f"/notes/{note_id}", headers=auth_header)
+        second = client.get(f"/notes/{note_id}", headers=auth_header)
+        assert first.content == second.content
+        assert note_cache.stats()["hits"] == 1
+        assert len(fake.store) == 1
+
+        client.put(f"/notes/{note_id}", json={"title": "Shared 2"}, headers=auth_header)
+        assert list(fake.store) == [f"note:{user_id}:{note_id}:invalidated"]
+    finally:
+        note_cache.set_backend(previous)
+
+def test_note_cache_put_skipped_after_invalidation(client, auth_header, user_id):
+    from backend.core import note_cache
+    from backend.core.config import settings
+    note = client.post("/notes/", json={"title": "Before"}, headers=auth_header).json()
+    # A reader loads the old row, then the write commits and invalidates
+    started = note_cache.read_started()
+    stale = note_cache.NoteCacheEntry(body=b"{}", etag=f'"{note["id"]}-1"', updated_at=None)
+    client.put(f"/notes/{note['id']}", json={"title": "After"}, headers=auth_header)
+
+    note_cache.put(user_id, note["id"], stale, started)
+    assert note_cache.get(user_id, note["id"]) is None
+    assert client.get(f"/notes/{note['id']}", headers=auth_header).json()["title"] == "After"
+
+    fresh_start = note_cache.read_started()
+    note_cache.put(user_id, note["id"], stale, fresh_start)
+    assert note_cache.get(user_id, note["id"]) == stale
+
+def test_note_cache_invalidations_survive_entry_eviction(monkeypatch):
+    from backend.core import note_cache
+    monkeypatch.setattr(note_cache, "backend", note_cache.LocalBackend(maxsize=2, ttl=60))
+    stale = note_cache.NoteCacheEntry(body=b"{}", etag='"1-1"', updated_at=None)
+    started = note_cache.read_started()
+    note_cache.invalidate(1, 1)
+    # Write churn on other notes must not push out note 1's mark
+    for note_id in range(2, 12):
+        note_cache.invalidate(1, note_id)
+    note_cache.put(1, 1, stale, started)
+    assert note_cache.get(1, 1) is None
+
+    # Marks are dropped only once they have expired
+    log = note_cache.InvalidationLog(ttl=10)
+    log.mark("a", 100.0)
+    log.mark("b", 105.0)
+    log.mark("c", 112.0)
+    assert (log.get("a"), log.get("b"), len(log)) == (None, 105.0, 2)
+
+def test_fast_json_is_byte_compatible(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    for i in range(3):
+        client.post("/notes/", json={"title": f"Bytes {i} – é", "content": "x\ny", "tags": [{"name": "ü"}]}, headers=auth_header)
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    fast = client.get("/notes/", headers=auth_header)
+    monkeypatch.setattr(settings, "FAST_JSON", False)
+    default = client.get("/notes/", headers=auth_header)
+    assert fast.content == default.content
+    assert fast.headers["ETag"] == default.headers["ETag"]
+
+def test_fast_json_dict_responses_are_byte_compatible(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    client.post("/notes/bulk", json={"notes": [{"title": "Bulk – é", "tags": [{"name": "ü"}]}]}, headers=auth_header)
+    client.post("/notes/import", content=b'{"title": "Imported"}\n', headers=auth_header)
+    bodies = {}
+    for fast in (True, False):
+        monkeypatch.setattr(settings, "FAST_JSON", fast)
+        # Only rejected items, so both passes create nothing and answer alike
+        bulk = client.post("/notes/bulk", json={"notes": [{"content": "no title"}]}, headers=auth_header)
+        imported = client.post("/notes/import", content=b'not json\n', headers=auth_header)
+        changes = client.get("/notes/changes?limit=1", headers=auth_header)
+        bodies[fast] = (bulk.status_code, bulk.content, imported.content, changes.content)
+    assert bodies[True] == bodies[False]
+
+def test_export_notes_ndjson(client, auth_header, monkeypatch):
+    import json
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_EXPORT_BATCH_SIZE", 2)
+    for i in range(5):
+        client.post("/notes/", json={"title": f"Export {i}", "tags": [{"name": f"e{i % 2}"}]}, headers=auth_header)
+
+    response = client.get("/notes/export", headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [n["title"] for n in lines] == [f"Export {i}" for i in range(5)]
+    assert [n["tags"][0]["name"] for n in lines] == ["e0", "e1", "e0", "e1", "e0"]
+
+def test_export_notes_csv_gzip(client, auth_header):
+    import csv
+    import io
+    client.post("/notes/", json={"title": "Comma, \"quoted\"", "content": "line1\nline2", "tags": [{"name": "a"}, {"name": "b"}]}, headers=auth_header)
+    response = client.get("/notes/export?format=csv&gzip=true", headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["title"] == 'Comma, "quoted"'
+    assert rows[0]["tags"] == "a|b"
+
+def test_export_notes_csv_without_notes_has_header(client, auth_header):
+    response = client.get("/notes/export?format=csv", headers=auth_header)
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["id,title,content,created_at,updated_at,tags"]
+
+def test_import_notes_ndjson(client, auth_header, monkeypatch):
+    import json
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_IMPORT_BATCH_SIZE", 2)
+    lines = [json.dumps({"title": f"Import {i}", "content": "a,\"b\"\nc", "tags": [{"name": "imp"}]}) for i in range(5)]
+    lines.insert(2, json.dumps({"content": "missing title"}))
+    lines.insert(4, "")
+    body = ("\n".join(lines) + "\n").encode()
+
+    response = client.post("/notes/import", content=body, headers={**auth_header, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 5
+    assert result["batches"] == 3
+    assert [e["index"] for e in result["errors"]] == [3]
+    assert result["errors_truncated"] is False
+
+    notes = client.get("/notes/?limit=10", headers=auth_header).json()
+    assert [n["title"] for n in notes] == [f"Import {i}" for i in range(5)]
+    assert notes[0]["content"] == "a,\"b\"\nc"
+    assert all(n["tags"][0]["name"] == "imp" for n in notes)
+
+def test_import_notes_rejects_oversized_line(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_IMPORT_MAX_LINE_BYTES", 64)
+    body = b'{"title": "' + b"x" * 100 + b'"}\n{"title": "ok"}'
+    result = client.post("/notes/import", content=body, headers=auth_header).json()
+    assert result["imported"] == 1
+    assert result["errors"][0]["index"] == 1
+
+def test_import_notes_keeps_null_content(client, auth_header):
+    body = b'{"title": "No content"}\n{"title": "Empty", "content": ""}\n'
+    assert client.post("/notes/import", content=body, headers=auth_header).json()["imported"] == 2
+    notes = client.get("/notes/", headers=auth_header).json()
+    assert [(n["title"], n["content"]) for n in notes] == [("No content", None), ("Empty", "")]
+
+def test_read_notes_filtered_by_tags(client, auth_header):
+    client.post("/notes/", json={"title": "A", "tags": [{"name": "red"}]}, headers=auth_header)
+    client.post("/notes/", json={"title": "AB", "tags": [{"name": "red"}, {"name": "blue"}]}, headers=auth_header)
+    client.post("/notes/", json={"title": "B", "tags": [{"name": "blue"}]}, headers=auth_header)
+    client.post("/notes/", json={"title": "None"}, headers=auth_header)
+
+    any_match = client.get("/notes/?tag=red&tag=blue", headers=auth_header).json()
+    assert [n["title"] for n in any_match] == ["A", "AB", "B"]
+    all_match = client.get("/notes/?tag=red&tag=blue&match=all", headers=auth_header).json()
+    assert [n["title"] for n in all_match] == ["AB"]
+    assert client.get("/notes/?tag=green", headers=auth_header).json() == []
+
+def test_patch_note_partial_fields_and_tag_diff(client, auth_header):
+    created = client.post("/notes/", json={"title": "Draft", "content": "body", "tags": [{"name": "a"}, {"name": "b"}]}, headers=auth_header)
+    note_id = created.json()["id"]
+
+    response = client.patch(f"/notes/{note_id}", json={"content": "edited"}, headers=auth_header)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Draft"
+    assert response.json()["content"] == "edited"
+    assert [t["name"] for t in response.json()["tags"]] == ["a", "b"]
+    assert response.headers["ETag"] == f'"{note_id}-2"'
+
+    response = client.patch(f"/notes/{note_id}", json={"add_tags": [{"name": "c"}], "remove_tags": ["a"]}, headers=auth_header)
+    assert sorted(t["name"] for t in response.json()["tags"]) == ["b", "c"]
+    counts = {t["name"]: t["note_count"] for t in client.get("/tags/?with_counts=true", headers=auth_header).json()}
+    assert counts == {"b": 1, "c": 1}
+
+    fetched = client.get(f"/notes/{note_id}", headers=auth_header)
+    assert fetched.json() == response.json()
+    assert fetched.headers["ETag"] == response.headers["ETag"]
+
+def test_patch_note_if_match_and_validation(client, auth_header):
+    created = client.post("/notes/", json={"title": "Draft"}, headers=auth_header)
+    note_id = created.json()["id"]
+    stale = {**auth_header, "If-Match": f'"{note_id}-0"'}
+    assert client.patch(f"/notes/{note_id}", json={"title": "X"}, headers=stale).status_code == 412
+    fresh = {**auth_header, "If-Match": client.get(f"/notes/{note_id}", headers=auth_header).headers["ETag"]}
+    assert client.patch(f"/notes/{note_id}", json={"title": "X"}, headers=fresh).status_code == 200
+    assert client.patch(f"/notes/{note_id}", json={"title": None}, headers=auth_header).status_code == 422
+    assert client.patch("/notes/999999", json={"title": "X"}, headers=auth_header).status_code == 404
+
+def test_batch_delete_notes(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_BATCH_DELETE_CHUNK_SIZE", 2)
+    ids = [
+        client.post("/notes/", json={"title": f"Old {i}", "tags": [{"name": "old" if i < 5 else "keep"}]}, headers=auth_header).json()["id"]
+        for i in range(7)
+    ]
+
+    response = client.post("/notes/batch-delete", json={"tag": "old"}, headers=auth_header)
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 5}
+    assert [n["id"] for n in client.get("/notes/", headers=auth_header).json()] == ids[5:]
+    assert client.get(f"/notes/{ids[0]}", headers=auth_header).status_code == 404
+    counts = {t["name"]: t["note_count"] for t in client.get("/tags/?with_counts=true", headers=auth_header).json()}
+    assert counts == {"keep": 2}
+
+    response = client.post("/notes/batch-delete", json={"ids": [ids[5], 999999]}, headers=auth_header)
+    assert response.json() == {"deleted": 1}
+    assert client.post("/notes/batch-delete", json={}, headers=auth_header).status_code == 422
+
+def test_batch_delete_notes_rejects_too_many_ids(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_BATCH_DELETE_MAX_IDS", 2)
+    response = client.post("/notes/batch-delete", json={"ids": [1, 2, 3]}, headers=auth_header)
+    assert response.status_code == 413
+    # The bulk create limit is independent
+    monkeypatch.setattr(settings, "NOTE_BULK_MAX_ITEMS", 1)
+    assert client.post("/notes/batch-delete", json={"ids": [1, 2]}, headers=auth_header).status_code == 200
+
+def test_batch_get_notes(client, auth_header, query_counter):
+    ids = [client.post("/notes/", json={"title": f"Get {i}", "tags": [{"name": f"g{i}"}]}, headers=auth_header).json()["id"] for i in range(4)]
+
+    query_counter.clear()
+    response = client.post("/notes/batch-get", json={"ids": [ids[2], ids[0], 999999, ids[2]]}, headers=auth_header)
+    assert response.status_code == 200
+    body = response.json()
+    assert [n["title"] for n in body["notes"]] == ["Get 2", "Get 0"]
+    assert [t["name"] for t in body["notes"][0]["tags"]] == ["g2"]
+    assert body["missing"] == [999999]
+    note_queries = [s for s in query_counter if "FROM notes" in s and "note_tag_association" not in s]
+    assert len(note_queries) == 1
+
+def test_batch_get_notes_rejects_oversized_batch(client, auth_header, monkeypatch):
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_BATCH_GET_MAX_IDS", 2)
+    assert client.post("/notes/batch-get", json={"ids": [1, 2, 3]}, headers=auth_header).status_code == 413
+
+def test_note_changes_feed(client, auth_header):
+    first = client.post("/notes/", json={"title": "One"}, headers=auth_header).json()
+    second = client.post("/notes/", json={"title": "Two"}, headers=auth_header).json()
+
+    initial = client.get("/notes/changes", headers=auth_header).json()
+    assert [n["title"] for n in initial["notes"]] == ["One", "Two"]
+    assert initial["deleted"] == []
+    assert initial["has_more"] is False
+
+    client.patch(f"/notes/{first['id']}", json={"title": "One edited"}, headers=auth_header)
+    client.delete(f"/notes/{second['id']}", headers=auth_header)
+    third = client.post("/notes/", json={"title": "Three"}, headers=auth_header).json()
+
+    changes = client.get(f"/notes/changes?since={initial['cursor']}&limit=2", headers=auth_header).json()
+    assert [n["title"] for n in changes["notes"]] == ["One edited"]
+    assert changes["deleted"] == [second["id"]]
+    assert changes["has_more"] is True
+
+    rest = client.get(f"/notes/changes?since={changes['cursor']}", headers=auth_header).json()
+    assert [n["id"] for n in rest["notes"]] == [third["id"]]
+    assert rest["has_more"] is False
+    assert client.get(f"/notes/changes?since={rest['cursor']}", headers=auth_header).json()["notes"] == []
+    assert client.get("/notes/changes?since=bogus", headers=auth_header).status_code == 400
+
+def test_note_changes_hold_back_until_older_writes_commit(client, auth_header, db_session):
+    from sqlalchemy.orm import Session
+    from backend.models.note import Note
+    first = client.post("/notes/", json={"title": "First"}, headers=auth_header).json()
+
+    # A slow writer draws its transaction id and change_seq first...
+    slow = Session(bind=db_session.get_bind())
+    try:
+        slow.get(Note, first["id"]).title = "Slow"
+        slow.flush()
+        # ...and a quick one commits after it
+        client.post("/notes/", json={"title": "Quick"}, headers=auth_header)
+        held = client.get("/notes/changes", headers=auth_header).json()
+        assert [n["title"] for n in held["notes"]] == ["First"]
+        slow.commit()
+    finally:
+        slow.close()
+
+    caught_up = client.get(f"/notes/changes?since={held['cursor']}", headers=auth_header).json()
+    assert [n["title"] for n in caught_up["notes"]] == ["Slow", "Quick"]
+
+def test_note_writes_publish_events(client, auth_header, user_id):
+    import asyncio
+    from backend.core import note_events
+
+    async def collect():
+        subscription = note_events.bus.subscribe(user_id)
+        try:
+            created = await asyncio.to_thread(client.post, "/notes/", json={"title": "Live"}, headers=auth_header)
+            note_id = created.json()["id"]
+            await asyncio.to_thread(client.patch, f"/notes/{note_id}", json={"content": "x"}, headers=auth_header)
+            await asyncio.to_thread(client.delete, f"/notes/{note_id}", headers=auth_header)
+            return note_id, [await subscription.get(timeout=1) for _ in range(3)]
+        finally:
+            note_events.unsubscribe(subscription)
+
+    note_id, events = asyncio.run(collect())
+    assert events == [
+        {"type": "created", "id": note_id, "version": 1},
+        {"type": "updated", "id": note_id, "version": 2},
+        {"type": "deleted", "id": note_id},
+    ]
+
+def test_note_event_subscription_overflow(monkeypatch):
+    import asyncio
+    from backend.core import note_events
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_EVENTS_BUFFER_SIZE", 2)
+
+    async def overflow():
+        subscription = note_events.bus.subscribe(42)
+        try:
+            for i in range(5):
+                note_events.publish(42, "created", i, 1)
+            await asyncio.sleep(0)
+            received = [await subscription.get(timeout=1) for _ in range(2)]
+            return subscription.overflowed, received
+        finally:
+            note_events.unsubscribe(subscription)
+
+    overflowed, received = asyncio.run(overflow())
+    assert overflowed is True
+    assert received == [{"type": "created", "id": 1, "version": 1}, None]
+
+class _EventStream:
+    """
+    Drives ``GET /notes/stream`` through the ASGI app directly, since the
+    test client only returns once a response body is complete.
+    """
+
+    def __init__(self, headers):
+        from backend.main import app
+
+        self._app = app
+        self._headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        self._requested = False
+        self._disconnected = asyncio.Event()
+        self._chunks = asyncio.Queue()
+        self.task = None
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            await self._chunks.put(message["body"])
+
+    def open(self):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/notes/stream", "raw_path": b"/notes/stream", "root_path": "",
+            "query_string": b"", "headers": self._headers, "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        self.task = asyncio.create_task(self._app(scope, self._receive, self._send))
+
+    async def next_chunk(self, timeout=2):
+        return await asyncio.wait_for(self._chunks.get(), timeout)
+
+    async def close(self):
+        self._disconnected.set()
+        await asyncio.wait_for(self.task, 2)
+
+def test_note_stream_endpoint(client, auth_header, user_id, monkeypatch):
+    from backend.core import note_events
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_STREAM_HEARTBEAT_SECONDS", 0.2)
+    client.post("/users/", json={"username": "other", "email": "other@example.com", "password": "securepass"})
+    other_token = client.post("/login", data={"username": "other@example.com", "password": "securepass"}).json()["access_token"]
+
+    async def watch():
+        stream = _EventStream(auth_header)
+        stream.open()
+        assert await stream.next_chunk() == b": connected\n\n"
+        assert note_events.stats()["subscribers"] == 1
+        # An idle stream is kept alive with heartbeat comments
+        assert await stream.next_chunk() == b": heartbeat\n\n"
+        # Another user's writes are not forwarded, so the first event is ours
+        await asyncio.to_thread(client.post, "/notes/", json={"title": "Theirs"}, headers={"Authorization": f"Bearer {other_token}"})
+        created = await asyncio.to_thread(client.post, "/notes/", json={"title": "Mine"}, headers=auth_header)
+        chunk = await stream.next_chunk()
+        while chunk == b": heartbeat\n\n":
+            chunk = await stream.next_chunk()
+        await stream.close()
+        return created.json()["id"], chunk
+
+    note_id, chunk = asyncio.run(watch())
+    assert chunk == f'event: created\ndata: {{"type": "created", "id": {note_id}, "version": 1}}\n\n'.encode()
+    # Disconnecting the client releases its subscription
+    assert note_events.stats()["subscribers"] == 0
+
+def test_note_stream_resyncs_and_closes_on_overflow(client, auth_header, user_id, monkeypatch):
+    from backend.core import note_events
+    from backend.core.config import settings
+    monkeypatch.setattr(settings, "NOTE_EVENTS_BUFFER_SIZE", 2)
+    dropped = note_events.bus.dropped_subscriptions
+
+    async def flood():
+        stream = _EventStream(auth_header)
+        stream.open()
+        assert await stream.next_chunk() == b": connected\n\n"
+        for i in range(5):
+            note_events.publish(user_id, "created", i, 1)
+        chunk = await stream.next_chunk()
+        # The stream ends by itself, without the client disconnecting
+        await asyncio.wait_for(stream.task, 2)
+        return chunk
+
+    assert asyncio.run(flood()) == b"event: resync\ndata: {}\n\n"
+    assert note_events.stats()["subscribers"] == 0
+    assert note_events.bus.dropped_subscriptions == dropped + 1
+
+def test_note_routes_in_async_mode(async_client):
+    client = async_client
+    client.post("/users/", json={"username": "asyncuser", "email": "async@example.com", "password": "securepass"})
+    login = client.post("/login", data={"username": "async@example.com", "password": "securepass"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    created = client.post("/notes/", json={"title": "Async", "content": "body", "tags": [{"name": "a"}]}, headers=headers)
+    assert created.status_code == 201
+    note_id = created.json()["id"]
+    client.post("/notes/bulk", json={"notes": [{"title": "Bulk"}]}, headers=headers)
+    assert [n["title"] for n in client.get("/notes/", headers=headers).json()] == ["Async", "Bulk"]
+    assert [n["title"] for n in client.get("/notes/", params={"tag": "a"}, headers=headers).json()] == ["Async"]
+
+    updated = client.patch(f"/notes/{note_id}", json={"content": "changed"}, headers=headers)
+    assert updated.json()["content"] == "changed"
+    assert client.get(f"/notes/{note_id}", headers=headers).json()["content"] == "changed"
+    assert client.get("/notes/changes", headers=headers).json()["notes"][-1]["id"] == note_id
+    assert client.get("/notes/export", headers=headers).content.count(b"\n") == 2
+
+    assert client.delete(f"/notes/{note_id}", headers=headers).status_code == 204
+    assert client.get(f"/notes/{note_id}", headers=headers).status_code == 404
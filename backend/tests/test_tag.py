@@ -0,0 +1,36 @@
+def test_read_tags_with_counts(client, auth_header):
+    first = client.post("/notes/", json={"title": "One", "tags": [{"name": "work"}, {"name": "urgent"}]}, headers=auth_header).json()
+    client.post("/notes/", json={"title": "Two", "tags": [{"name": "work"}]}, headers=auth_header)
+    client.post("/notes/bulk", json={"notes": [{"title": "Three", "tags": [{"name": "home"}, {"name": "work"}]}]}, headers=auth_header)
+
+    response = client.get("/tags/?with_counts=true", headers=auth_header)
+    assert response.status_code == 200
+    assert {t["name"]: t["note_count"] for t in response.json()} == {"home": 1, "urgent": 1, "work": 3}
+
+    client.put(f"/notes/{first['id']}", json={"title": "One", "tags": [{"name": "home"}]}, headers=auth_header)
+    counts = {t["name"]: t["note_count"] for t in client.get("/tags/?with_counts=true", headers=auth_header).json()}
+    assert counts == {"home": 2, "work": 2}
+
+    client.delete(f"/notes/{first['id']}", headers=auth_header)
+    tags = client.get("/tags/", headers=auth_header).json()
+    assert [t["name"] for t in tags] == ["home", "work"]
+    assert "note_count" not in tags[0]
+
+def test_rebuild_tag_counts(client, auth_header, db_session):
+    from sqlalchemy import text
+    from backend.crud import tag as tag_crud
+    client.post("/notes/", json={"title": "One", "tags": [{"name": "a"}, {"name": "b"}]}, headers=auth_header)
+    db_session.execute(text("UPDATE tag_usage SET note_count = 7"))
+    db_session.commit()
+
+    assert tag_crud.rebuild_tag_counts(db_session) == 2
+    counts = {t["name"]: t["note_count"] for t in client.get("/tags/?with_counts=true", headers=auth_header).json()}
+    assert counts == {"a": 1, "b": 1}
+
+def test_read_tags_joins_tags_once(client, auth_header, query_counter):
+    client.post("/notes/", json={"title": "One", "tags": [{"name": "b"}, {"name": "a"}]}, headers=auth_header)
+    query_counter.clear()
+    assert [t["name"] for t in client.get("/tags/", headers=auth_header).json()] == ["a", "b"]
+    tag_queries = [s for s in query_counter if "FROM tag_usage" in s]
+    assert len(tag_queries) == 1
+    assert tag_queries[0].count("JOIN tags") == 1
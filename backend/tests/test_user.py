@@ -18,3 +18,50 @@ def test_get_user(client, auth_header):
     assert response.status_code == 200
     data = response.json()
     assert data["email"] == "user2@example.com"
+
+def test_authenticated_request_skips_user_lookup(client, auth_header, query_counter):
+    client.get("/notes/", headers=auth_header)
+    query_counter.clear()
+    response = client.get("/notes/", headers=auth_header)
+    assert response.status_code == 200
+    assert not any("FROM users" in statement for statement in query_counter)
+
+def test_password_change_revokes_existing_tokens(client, auth_header):
+    assert client.get("/notes/", headers=auth_header).status_code == 200
+
+    response = client.put("/users/1", json={"password": "newpass123"}, headers=auth_header)
+    assert response.status_code == 200
+
+    assert client.get("/notes/", headers=auth_header).status_code == 401
+    login_res = client.post("/login", data={"username": "testuser@example.com", "password": "newpass123"})
+    new_header = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    assert client.get("/notes/", headers=new_header).status_code == 200
+
+def test_tokens_without_version_are_rejected(client, auth_header):
+    from backend.core.security import create_access_token
+    legacy = create_access_token({"sub": "testuser@example.com"})
+    assert client.get("/notes/", headers={"Authorization": f"Bearer {legacy}"}).status_code == 401
+
+def test_login_rehashes_password_with_outdated_cost(client, db_session):
+    from passlib.hash import bcrypt
+    from backend.core.security import pwd_context
+    from backend.models.user import User
+    client.post("/users/", json={"username": "old", "email": "old@example.com", "password": "securepass"})
+    user = db_session.query(User).filter(User.email == "old@example.com").first()
+    user.hashed_password = bcrypt.using(rounds=4).hash("securepass")
+    db_session.commit()
+
+    response = client.post("/login", data={"username": "old@example.com", "password": "securepass"})
+    assert response.status_code == 200
+    # The request's session override closed db_session, detaching ``user``
+    db_session.expire_all()
+    hashed_password = db_session.query(User.hashed_password).filter(User.email == "old@example.com").scalar()
+    assert not pwd_context.needs_update(hashed_password)
+    assert pwd_context.verify("securepass", hashed_password)
+
+def test_password_hasher_usable_after_shutdown():
+    import asyncio
+    from backend.core.security import password_hasher, pwd_context
+    password_hasher.shutdown()
+    hashed = asyncio.run(password_hasher.hash("securepass"))
+    assert pwd_context.verify("securepass", hashed)
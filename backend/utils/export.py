@@ -0,0 +1,87 @@
+"""
+Encoders for streaming note exports (NDJSON / CSV, optionally gzipped).
+
+Each encoder turns batches of note dicts (see
+``backend.crud.note.iter_export_batches``) into byte chunks, so an export
+never holds more than one batch in memory.
+"""
+
+import csv
+import io
+import zlib
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
+from backend.utils.serialization import NOTE_ADAPTER
+
+CSV_COLUMNS = ("id", "title", "content", "created_at", "updated_at", "tags")
+
+
+def encode_ndjson(batch: List[dict]) -> bytes:
+    """
+    One JSON object per line, in the same shape as the note API responses.
+    """
+    return b"".join(NOTE_ADAPTER.dump_json(NOTE_ADAPTER.validate_python(note)) + b"\n" for note in batch)
+
+
+def _csv_line(row) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+class CsvEncoder:
+    """
+    Encodes batches as CSV rows; tags are ``|``-separated names. The
+    ``header`` row is written by ``encode_batches`` before any batch, so an
+    export with no notes is still a header-only CSV.
+    """
+
+    header = _csv_line(CSV_COLUMNS)
+
+    def __call__(self, batch: List[dict]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for note in batch:
+            writer.writerow((
+                note["id"],
+                note["title"],
+                note["content"] or "",
+                note["created_at"].isoformat() if note["created_at"] else "",
+                note["updated_at"].isoformat() if note["updated_at"] else "",
+                "|".join(tag["name"] for tag in note["tags"]),
+            ))
+        return buffer.getvalue().encode("utf-8")
+
+
+def _header(encoder, compressor) -> bytes:
+    header = getattr(encoder, "header", b"")
+    return compressor.compress(header) if compressor is not None else header
+
+
+def encode_batches(batches: Iterable[List[dict]], encoder, compress: bool = False) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    header = _header(encoder, compressor)
+    if header:
+        yield header
+    for batch in batches:
+        chunk = encoder(batch)
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+async def aencode_batches(batches: AsyncIterable[List[dict]], encoder, compress: bool = False) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    header = _header(encoder, compressor)
+    if header:
+        yield header
+    async for batch in batches:
+        chunk = encoder(batch)
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
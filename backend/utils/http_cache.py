@@ -0,0 +1,102 @@
+"""
+Helpers for HTTP conditional requests (ETag / Last-Modified).
+
+Note ETags are strong validators built from the note id and its ``version``
+column, which is bumped on every write; list ETags hash the (id, version)
+pairs of the page.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Set, Tuple
+
+
+def note_etag(note_id: int, version: int) -> str:
+    return f'"{note_id}-{version}"'
+
+
+def page_etag(versions: Iterable[Tuple[int, int]]) -> str:
+    digest = hashlib.sha1()
+    for note_id, version in versions:
+        digest.update(f"{note_id}:{version};".encode("ascii"))
+    return f'"{digest.hexdigest()}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamp columns are naive and hold UTC wall-clock time
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return format_datetime(_as_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def is_not_modified(headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    it is absent (RFC 9110 section 13.2.2).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def if_match_satisfied(headers, etag: str) -> bool:
+    """
+    Evaluate If-Match for a write; true when the header is absent.
+    """
+    if_match = headers.get("if-match")
+    if if_match is None:
+        return True
+    return _etag_matches(if_match, etag)
+
+
+def if_match_versions(headers, note_id: int) -> Optional[Set[int]]:
+    """
+    Translate If-Match into the note versions it accepts, so a write can
+    be made conditional in SQL without reading the note first.
+
+    Returns None when the header is absent or ``*`` (no constraint); an
+    empty set means no listed ETag belongs to this note.
+    """
+    if_match = headers.get("if-match")
+    if if_match is None:
+        return None
+    versions = set()
+    prefix = f'"{note_id}-'
+    for candidate in (c.strip() for c in if_match.split(",")):
+        if candidate == "*":
+            return None
+        if candidate.startswith(prefix) and candidate.endswith('"'):
+            version = candidate[len(prefix):-1]
+            if version.isdigit():
+                versions.add(int(version))
+    return versions
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag}
+    modified = http_date(last_modified)
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
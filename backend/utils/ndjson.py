@@ -0,0 +1,49 @@
+"""
+Incremental NDJSON parsing for streamed request bodies.
+"""
+
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into lines without buffering more than one line.
+
+    Blank lines are skipped but still counted. A line longer than
+    ``max_line_bytes`` is discarded as it streams in and yielded as ``None``
+    so the caller can report it.
+
+    Yields:
+        Tuple[int, Optional[bytes]]: 1-based line number and the line (without
+        the newline), or None if it was too long.
+    """
+    buffer = bytearray()
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        oversized = True
+                        buffer.clear()
+                break
+            line_no += 1
+            if oversized:
+                yield line_no, None
+            else:
+                buffer += chunk[start:newline]
+                if len(buffer) > max_line_bytes:
+                    yield line_no, None
+                elif buffer.strip():
+                    yield line_no, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = newline + 1
+    if oversized:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, bytes(buffer)
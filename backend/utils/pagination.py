@@ -0,0 +1,76 @@
+"""
+Helpers for opaque keyset (cursor) pagination.
+
+Cursors encode the sort key of the last row on a page so the next page can
+resume with a ``WHERE id > :last_id`` seek instead of an OFFSET scan.
+"""
+
+import base64
+import json
+from typing import Tuple
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Encode the id of the last row on a page into an opaque cursor string.
+
+    Args:
+        last_id (int): ID of the last row returned.
+
+    Returns:
+        str: URL-safe cursor token.
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor (str): Opaque cursor token from a previous page.
+
+    Returns:
+        int: The id to resume after.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = payload["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def encode_change_cursor(position: Tuple[int, int]) -> str:
+    """
+    Encode a change feed position, ``(change_xid, change_seq)``, into an
+    opaque cursor string.
+    """
+    xid, seq = position
+    raw = json.dumps({"xid": xid, "seq": seq}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Decode a cursor produced by ``encode_change_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = (payload["xid"], payload["seq"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if any(not isinstance(value, int) or isinstance(value, bool) for value in position):
+        raise ValueError("Invalid cursor")
+    return position
@@ -0,0 +1,79 @@
+"""
+Fast JSON rendering for note responses.
+
+FastAPI's default path validates a handler's return value against the
+response model, dumps it to Python primitives, then encodes them with the
+stdlib ``json`` module. Here ORM objects are validated once through a
+precompiled ``TypeAdapter`` (``from_attributes``) and written straight to
+JSON bytes by pydantic-core. Dict payloads (bulk and import results, the
+change feed) are encoded with orjson when it is installed. The output is
+byte-identical to FastAPI's ``JSONResponse`` (compact separators, raw UTF-8).
+"""
+
+import json
+from typing import Any, Iterable, List
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from backend.schemas.note import Note, NoteBatchGetResult
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+NOTE_ADAPTER = TypeAdapter(Note)
+NOTE_LIST_ADAPTER = TypeAdapter(List[Note])
+NOTE_BATCH_ADAPTER = TypeAdapter(NoteBatchGetResult)
+
+
+def render_note(note: Any) -> bytes:
+    """
+    Serialize one Note ORM object to JSON bytes.
+    """
+    return NOTE_ADAPTER.dump_json(NOTE_ADAPTER.validate_python(note, from_attributes=True))
+
+
+def render_notes(notes: Iterable[Any]) -> bytes:
+    """
+    Serialize a sequence of Note ORM objects to a JSON array.
+    """
+    return NOTE_LIST_ADAPTER.dump_json(NOTE_LIST_ADAPTER.validate_python(list(notes), from_attributes=True))
+
+
+def render_note_batch(notes: Iterable[Any], missing: List[int]) -> bytes:
+    """
+    Serialize a batch read result (Note ORM objects plus missing ids).
+    """
+    result = NOTE_BATCH_ADAPTER.validate_python({"notes": list(notes), "missing": missing}, from_attributes=True)
+    return NOTE_BATCH_ADAPTER.dump_json(result)
+
+
+def note_dicts(notes: Iterable[Any]) -> List[dict]:
+    """
+    JSON-ready dicts for Note ORM objects, to embed in a larger payload
+    that is encoded by ``FastJSONResponse``.
+    """
+    return NOTE_LIST_ADAPTER.dump_python(NOTE_LIST_ADAPTER.validate_python(list(notes), from_attributes=True), mode="json")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode JSON-compatible Python data, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that sends pre-rendered bytes as-is and encodes any other
+    content with ``dumps``.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return dumps(content)
+
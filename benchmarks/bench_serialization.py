@@ -0,0 +1,63 @@
+"""
+Benchmark note list serialization: FastAPI's default response path versus
+the pre-rendered TypeAdapter path used when FAST_JSON is enabled.
+
+Run from the project root:
+    python -m benchmarks.bench_serialization [page_size] [iterations]
+"""
+
+import sys
+import timeit
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.schemas.note import Note
+from backend.utils.serialization import render_notes
+
+
+def make_notes(count: int) -> list:
+    base = datetime(2025, 6, 24, 13, 41, 48, 292498)
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f"Note {i} – café",
+            content="Lorem ipsum dolor sit amet, " * 8,
+            created_at=base + timedelta(seconds=i),
+            updated_at=base + timedelta(seconds=i, microseconds=17),
+            tags=[SimpleNamespace(id=t, name=f"tag-{t}") for t in range(i % 4)],
+        )
+        for i in range(count)
+    ]
+
+
+# Mirrors fastapi.routing.serialize_response + JSONResponse for response_model=list[Note]
+_response_field_adapter = TypeAdapter(List[Note])
+
+
+def fastapi_default(notes: list) -> bytes:
+    value = _response_field_adapter.validate_python(notes, from_attributes=True)
+    content = _response_field_adapter.dump_python(value, mode="json")
+    return JSONResponse(content).body
+
+
+def main() -> None:
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    notes = make_notes(page_size)
+
+    assert fastapi_default(notes) == render_notes(notes), "fast path output differs"
+
+    baseline = min(timeit.repeat(lambda: fastapi_default(notes), number=iterations, repeat=5))
+    fast = min(timeit.repeat(lambda: render_notes(notes), number=iterations, repeat=5))
+    print(f"page_size={page_size} iterations={iterations}")
+    print(f"fastapi default: {baseline / iterations * 1e6:9.1f} us/page")
+    print(f"fast path:       {fast / iterations * 1e6:9.1f} us/page")
+    print(f"speedup:         {baseline / fast:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()